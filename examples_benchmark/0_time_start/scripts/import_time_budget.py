@@ -0,0 +1,44 @@
+# Time of "import unifr_api_epuck.wrapper" in a new interpreter, checked against a budget.
+# torch, torchvision and cv2 must not be imported before detection or the camera are used.
+# python3 import_time_budget.py --runs 10 --budget 1.0
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MEASURE = '''
+import json, sys, time, resource
+start = time.perf_counter()
+import unifr_api_epuck.wrapper
+duration = time.perf_counter() - start
+heavy = [name for name in ('torch', 'torchvision', 'cv2') if name in sys.modules]
+print(json.dumps({'seconds': duration, 'heavy_modules': heavy,
+                  'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--runs', type=int, default=10)
+parser.add_argument('--budget', type=float, default=1.0, help='maximum median import time in seconds')
+parser.add_argument('--output', default='results_import_time.json')
+args = parser.parse_args()
+
+results = []
+for _ in range(args.runs):
+    output = subprocess.run([sys.executable, '-c', MEASURE], capture_output=True, text=True, check=True).stdout
+    results.append(json.loads(output.strip().splitlines()[-1]))
+
+times = [result['seconds'] for result in results]
+median = statistics.median(times)
+heavy = sorted({name for result in results for name in result['heavy_modules']})
+print('import unifr_api_epuck.wrapper: median={:.3f}s min={:.3f}s max={:.3f}s max_rss={}MB'.format(
+    median, min(times), max(times), max(result['max_rss_kb'] for result in results) // 1024))
+
+with open(args.output, 'w') as file:
+    json.dump({'budget': args.budget, 'runs': results}, file, indent=2)
+
+if heavy:
+    sys.exit('Imported at startup: ' + ', '.join(heavy))
+if median > args.budget:
+    sys.exit('Over the budget of {:.3f}s'.format(args.budget))
+print('Within the budget of {:.3f}s'.format(args.budget))
@@ -0,0 +1,30 @@
+# Durations of the phases of go_on(), measured by the package itself (init_latency_stats)
+# python3 go_on_latency_stats.py 192.168.224.240 --steps 300 --camera
+from unifr_api_epuck import wrapper
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('ip_addr', nargs='?', default=None, help='IP address of the e-puck (or of the Pi-puck with --pipuck)')
+parser.add_argument('--pipuck', action='store_true')
+parser.add_argument('--camera', action='store_true')
+parser.add_argument('--steps', type=int, default=300)
+parser.add_argument('--output', default='results_go_on_latency.json')
+args = parser.parse_args()
+
+r = wrapper.get_robot(args.ip_addr, args.pipuck)
+r.init_sensors()
+if args.camera:
+    r.init_camera()
+
+r.init_latency_stats()
+for _ in range(args.steps):
+    r.go_on()
+    if args.camera:
+        r.get_camera()
+
+for phase, stats in r.get_latency_stats().items():
+    print('{:18} n={:5} mean={:8.3f}ms p50={:8.3f}ms p99={:8.3f}ms'.format(
+        phase, stats['count'], stats['mean'] * 1e3, stats['p50'] * 1e3, stats['p99'] * 1e3))
+
+r.dump_latency_stats(args.output)
+r.clean_up()
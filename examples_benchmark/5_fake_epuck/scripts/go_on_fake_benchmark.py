@@ -0,0 +1,64 @@
+# Benchmark of go_on() against simulated e-pucks (no hardware needed)
+# python3 go_on_fake_benchmark.py --robots 10 --latency 0.01 --jitter 0.002
+from unifr_api_epuck.fake_epuck_server import FakeEpuckServer
+from unifr_api_epuck import wrapper
+import argparse, asyncio, json, time
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--robots', type=int, default=10)
+parser.add_argument('--steps', type=int, default=200)
+parser.add_argument('--latency', type=float, default=0.01)
+parser.add_argument('--jitter', type=float, default=0.002)
+parser.add_argument('--output', default='results_go_on_fake.json')
+args = parser.parse_args()
+
+server = FakeEpuckServer(robots=args.robots, port=0, latency=args.latency, jitter=args.jitter)
+addresses = server.start_in_thread()
+results = {}
+
+# one robot, blocking go_on
+r = wrapper.get_robot(addresses[0])
+r.init_camera()
+start = time.time()
+for _ in range(args.steps):
+    r.go_on()
+results['wifi_go_on_hz'] = args.steps / (time.time() - start)
+
+# one robot, pipelined go_on
+r.init_pipeline()
+start = time.time()
+for _ in range(args.steps):
+    r.go_on()
+results['wifi_pipelined_go_on_hz'] = args.steps / (time.time() - start)
+r.disable_pipeline()
+
+# all the robots in a fleet
+fleet = wrapper.get_fleet(addresses)
+start = time.time()
+latencies = []
+for _ in range(args.steps):
+    fleet.go_on()
+    latencies += list(fleet.get_latencies().values())
+results['fleet_tick_hz'] = args.steps / (time.time() - start)
+results['fleet_latencies'] = latencies
+
+# all the robots with asyncio
+async def run_async():
+    robots = await asyncio.gather(*[wrapper.get_async_robot(address) for address in addresses])
+
+    async def controller(robot):
+        for _ in range(args.steps):
+            await robot.go_on()
+
+    start = time.time()
+    await asyncio.gather(*[controller(robot) for robot in robots])
+    return args.steps / (time.time() - start)
+
+results['async_go_on_hz'] = asyncio.run(run_async())
+
+server.stop()
+
+with open(args.output, 'w') as f:
+    json.dump(results, f, indent=2)
+
+print({key: value for key, value in results.items() if key != 'fleet_latencies'})
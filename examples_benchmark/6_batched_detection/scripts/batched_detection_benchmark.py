@@ -0,0 +1,32 @@
+# Throughput of the detection: one get_detection() per frame against one get_detections() on the batch of frames
+# python3 batched_detection_benchmark.py --frames 8 --steps 50 --threads 1
+from unifr_api_epuck.epuck.model_registry import model_registry
+from unifr_api_epuck.epuck.detector import detect
+import argparse
+import time
+import numpy as np
+import torch
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--weights', default=None, help='.pt file (default: the weights of the package)')
+parser.add_argument('--frames', type=int, default=8, help='number of frames, e.g. one per robot')
+parser.add_argument('--steps', type=int, default=50)
+parser.add_argument('--threads', type=int, default=1, help='number of threads of torch')
+args = parser.parse_args()
+
+torch.set_num_threads(args.threads)
+model = model_registry.get(args.weights, warmup=3)
+frames = [np.random.randint(0, 256, (120, 160, 3), dtype=np.uint8) for _ in range(args.frames)]
+
+start = time.perf_counter()
+for _ in range(args.steps):
+    sequential = [detect(model, [frame])[0] for frame in frames]
+sequential_time = (time.perf_counter() - start) / (args.steps * args.frames)
+
+start = time.perf_counter()
+for _ in range(args.steps):
+    batched = detect(model, frames)
+batched_time = (time.perf_counter() - start) / (args.steps * args.frames)
+
+print('sequential: {:.2f}ms per frame ({:.1f} frames/s)'.format(sequential_time * 1e3, 1 / sequential_time))
+print('batched:    {:.2f}ms per frame ({:.1f} frames/s), x{:.2f}'.format(batched_time * 1e3, 1 / batched_time, sequential_time / batched_time))
@@ -0,0 +1,122 @@
+# Accuracy and latency of the int8 quantized network against the FP32 fused network, on annotated frames of the dataset
+# which were not used to calibrate the quantization. Export the networks first:
+#   python3 -m unifr_api_epuck.export_model --weights best.pt --include onnx onnx-int8
+#   python3 quantization_report.py --weights best.pt --frames 500 --calibration 300   (writes ../data/quantization_report.csv)
+from unifr_api_epuck.epuck.model_registry import model_registry
+from unifr_api_epuck.epuck.detector import LABELS
+from unifr_api_epuck.epuck.image_encoding import read_bmp
+from unifr_api_epuck.export_model import held_out_files
+import argparse
+import csv
+import os
+import time
+import numpy as np
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--weights', default=None, help='.pt file (default: the weights of the package)')
+parser.add_argument('--backends', nargs='+', default=['eager', 'onnxruntime', 'onnxruntime-int8'])
+parser.add_argument('--frames', type=int, default=500, help='number of annotated frames')
+parser.add_argument('--calibration', type=int, default=300, help='--calibration of export_model, its frames are left out')
+parser.add_argument('--batch', type=int, default=8, help='frames per pass for the batched latency')
+parser.add_argument('--conf', type=float, default=0.9, help='confidence of the precision and recall (default of get_detection)')
+parser.add_argument('--iou', type=float, default=0.5, help='overlap of a detection with its label to be correct')
+parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'quantization_report.csv'),
+                    help='csv file of the results (default: data/quantization_report.csv of this benchmark)')
+args = parser.parse_args()
+
+# the frames which did not calibrate the quantization of export_model
+files = held_out_files(args.frames, args.calibration)
+frames = [read_bmp(file) for file in files]
+classes = {name: number for number, name in LABELS.items()}
+
+
+def read_labels(file, shape):
+    # class x_center y_center width height, relative to the size of the frame
+    height, width = shape[:2]
+    labels = np.loadtxt(os.path.splitext(file)[0] + '.txt', ndmin=2).reshape(-1, 5)
+    return labels * [1, width, height, width, height]
+
+
+def iou(box, boxes):
+    # boxes as x_center, y_center, width, height
+    x1 = np.maximum(box[0] - box[2] / 2, boxes[:, 0] - boxes[:, 2] / 2)
+    y1 = np.maximum(box[1] - box[3] / 2, boxes[:, 1] - boxes[:, 3] / 2)
+    x2 = np.minimum(box[0] + box[2] / 2, boxes[:, 0] + boxes[:, 2] / 2)
+    y2 = np.minimum(box[1] + box[3] / 2, boxes[:, 1] + boxes[:, 3] / 2)
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    return inter / (box[2] * box[3] + boxes[:, 2] * boxes[:, 3] - inter)
+
+
+def match(detections, labels):
+    # (confidence, class, correct) of each detection, greedy matching by decreasing confidence
+    results = []
+    for detection, label in zip(detections, labels):
+        used = np.zeros(len(label), dtype=bool)
+        for item in sorted(detection, key=lambda item: -item.confidence):
+            cls = classes.get(item.label, item.label)
+            candidates = (label[:, 0] == cls) & ~used
+            correct = False
+            if candidates.any():
+                overlaps = np.where(candidates, iou([item.x_center, item.y_center, item.width, item.height], label[:, 1:]), 0)
+                best = overlaps.argmax()
+                if overlaps[best] >= args.iou:
+                    used[best] = correct = True
+            results.append((item.confidence, cls, correct))
+    return results
+
+
+def average_precision(results, labels):
+    # mean over the classes of the area under the precision recall curve
+    aps = []
+    for cls in np.unique(np.concatenate([label[:, 0] for label in labels])):
+        total = sum((label[:, 0] == cls).sum() for label in labels)
+        correct = np.array([c for conf, k, c in sorted(results, key=lambda r: -r[0]) if k == cls], dtype=float)
+        if not len(correct):
+            aps.append(0.0)
+            continue
+        recall = np.concatenate([[0], np.cumsum(correct) / total, [1]])
+        precision = np.concatenate([[1], np.cumsum(correct) / np.arange(1, len(correct) + 1), [0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum(np.diff(recall) * precision[1:])))
+    return float(np.mean(aps))
+
+
+labels = [read_labels(file, frame.shape) for file, frame in zip(files, frames)]
+rows = []
+for backend in args.backends:
+    try:
+        model = model_registry.get(args.weights, backend=backend, warmup=3)
+    except (ImportError, FileNotFoundError) as e:
+        print('{:16} skipped: {}'.format(backend, e))
+        continue
+
+    start = time.perf_counter()
+    detections = [model.detect([frame], 0.0)[0] for frame in frames]
+    single = (time.perf_counter() - start) / len(frames)
+
+    start = time.perf_counter()
+    for i in range(0, len(frames), args.batch):
+        model.detect(frames[i:i + args.batch], 0.0)
+    batched = (time.perf_counter() - start) / len(frames)
+
+    results = match(detections, labels)
+    kept = [correct for conf, _, correct in results if conf >= args.conf]
+    stats = model.get_stats()
+    rows.append({'backend': backend, 'frames': len(frames),
+                 'ms_per_frame': round(single * 1e3, 2), 'ms_per_frame_batched': round(batched * 1e3, 2),
+                 'precision': round(float(np.mean(kept)) if kept else 0.0, 4),
+                 'recall': round(sum(kept) / sum(len(label) for label in labels), 4),
+                 'map50': round(average_precision(results, labels), 4),
+                 'load_time': round(stats['load_time'], 3), 'memory_mb': round(stats['memory'] / 1e6, 1)})
+
+print('{:16} {:>8} {:>10} {:>10} {:>8} {:>8} {:>8} {:>10}'.format(
+    'backend', 'frames', 'ms/frame', 'batched', 'prec', 'recall', 'mAP50', 'memory MB'))
+for row in rows:
+    print('{backend:16} {frames:8} {ms_per_frame:10} {ms_per_frame_batched:10} {precision:8} {recall:8} {map50:8} {memory_mb:10}'.format(**row))
+
+if args.output and rows:
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
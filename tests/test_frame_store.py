@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from unifr_api_epuck.epuck.frame_store import FrameStore
+
+
+def test_append_to_existing_store_with_other_shape(tmp_path):
+    path = str(tmp_path / 'dataset')
+    store = FrameStore(path, 'a', (120, 160, 3))
+    for i in range(5):
+        store.append(np.full((120, 160, 3), i, dtype=np.uint8), robot_id='robot')
+    store.close()
+
+    with pytest.raises(ValueError):
+        FrameStore(path, 'a', (240, 320, 3))
+
+    # the existing frames are untouched
+    store = FrameStore(path)
+    assert len(store) == 5
+    assert store.frames.shape == (5, 120, 160, 3)
+    assert [int(frame[0, 0, 0]) for frame in store.frames] == [0, 1, 2, 3, 4]
+
+
+def test_append_to_existing_store_with_same_shape(tmp_path):
+    path = str(tmp_path / 'dataset')
+    store = FrameStore(path, 'a', (120, 160, 3))
+    store.append(np.zeros((120, 160, 3), dtype=np.uint8))
+    store.close()
+
+    store = FrameStore(path, 'a', [120, 160, 3])
+    store.append(np.ones((120, 160, 3), dtype=np.uint8))
+    store.close()
+    assert len(FrameStore(path)) == 2
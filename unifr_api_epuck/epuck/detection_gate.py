@@ -0,0 +1,117 @@
+import numpy as np
+
+# default threshold of each method: mean difference of the gray levels (0-255), or number of different bits of the hash (0-64)
+GATE_THRESHOLDS = {'diff': 4.0, 'hash': 10}
+
+
+def _gray_blocks(frame, rows, cols):
+    """
+    :param frame: HxWx3 array (get_frame) or [red, green, blue] arrays (get_camera)
+    :returns: rows x cols float32 array, mean gray level of each block of the frame
+    """
+    frame = np.asarray(frame)
+    gray = frame.mean(axis=2 if frame.shape[-1] == 3 else 0, dtype=np.float32)
+
+    # blocks of (almost) equal size, the height and width do not need to be multiples of rows and cols
+    row_starts = np.arange(rows) * gray.shape[0] // rows
+    col_starts = np.arange(cols) * gray.shape[1] // cols
+    sums = np.add.reduceat(np.add.reduceat(gray, row_starts, axis=0), col_starts, axis=1)
+    counts = np.outer(np.diff(np.append(row_starts, gray.shape[0])), np.diff(np.append(col_starts, gray.shape[1])))
+    return sums / counts
+
+
+class DetectionGate:
+    """
+    Skips the detection of frames which almost did not change since the last frame analysed:
+    live_detection() then reuses the previous detections instead of running the network.
+
+    Two ways of comparing a frame with the last frame analysed:
+
+    - 'diff': mean absolute difference of the gray levels of the frames reduced to 15x20 blocks (threshold in gray levels, 0-255)
+    - 'hash': difference hash of 64 bits of the frames (threshold in number of different bits, 0-64),
+      more sensitive to the noise of the camera on plain surfaces
+
+    .. code-block:: python
+
+        robot.initiate_model()
+        robot.init_detection_gate(threshold=4.0)
+        while robot.go_on():
+            robot.live_detection()
+        print(robot.get_detection_gate_stats())   # hits, misses and hit_rate
+
+    :var hits: number of frames whose detection was skipped
+    :var misses: number of frames analysed by the network
+    """
+
+    def __init__(self, threshold=None, method='diff', max_skips=30):
+        """
+        :param threshold: largest change of a frame which reuses the previous detections (default: 4.0 for 'diff', 10 for 'hash')
+        :param method: 'diff' or 'hash'
+        :param max_skips: number of frames skipped in a row after which a frame is analysed anyway (None: no limit)
+        """
+        if method not in GATE_THRESHOLDS:
+            raise ValueError('Unknown detection gate method: ' + str(method) + ' (' + ', '.join(GATE_THRESHOLDS) + ')')
+        self.method = method
+        self.threshold = GATE_THRESHOLDS[method] if threshold is None else threshold
+        self.max_skips = max_skips
+        self.hits = 0
+        self.misses = 0
+
+        # signature of the last frame analysed
+        self.__reference = None
+        self.__skips = 0
+
+    def signature(self, frame):
+        """
+        :param frame: HxWx3 array (get_frame) or [red, green, blue] arrays (get_camera)
+        :returns: 15x20 float32 array ('diff') or 64 booleans ('hash') summarising the frame
+        """
+        if self.method == 'diff':
+            return _gray_blocks(frame, 15, 20)
+        # difference hash: is each block brighter than its right neighbour
+        blocks = _gray_blocks(frame, 8, 9)
+        return (blocks[:, 1:] > blocks[:, :-1]).ravel()
+
+    def distance(self, a, b):
+        """
+        :returns: change between two signatures, compared to the threshold
+        """
+        if self.method == 'diff':
+            return float(np.abs(a - b).mean())
+        return int(np.count_nonzero(a != b))
+
+    def changed(self, frame):
+        """
+        Compares the frame with the last frame analysed and counts a hit or a miss
+
+        :param frame: HxWx3 array (get_frame) or [red, green, blue] arrays (get_camera)
+        :returns: True if the frame must be analysed (it becomes the new reference), False if the previous detections can be reused
+        """
+        signature = self.signature(frame)
+        if (self.__reference is not None and (self.max_skips is None or self.__skips < self.max_skips)
+                and self.distance(signature, self.__reference) <= self.threshold):
+            self.hits += 1
+            self.__skips += 1
+            return False
+
+        self.misses += 1
+        self.__skips = 0
+        self.__reference = signature
+        return True
+
+    def reset(self):
+        """
+        Forgets the last frame analysed (the next frame is analysed) and the counters
+        """
+        self.__reference = None
+        self.__skips = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        """
+        :returns: dict - method, threshold, hits, misses and hit_rate (fraction of the frames whose detection was skipped)
+        """
+        total = self.hits + self.misses
+        return {'method': self.method, 'threshold': self.threshold, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
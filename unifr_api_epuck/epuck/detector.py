@@ -0,0 +1,152 @@
+import random
+import numpy as np
+from .model_registry import INPUT_SHAPE
+
+# names of the classes of the default weights, the other classes are given by their number
+LABELS = {0: "Red Block", 1: "Black Block", 2: "Black Ball", 3: "Blue Block", 4: "Epuck", 5: "Green Block"}
+
+# thresholds of the non maximum suppression, the confidence one is raised to the conf_thresh of the detection
+NMS_CONF_THRESH = 0.25
+NMS_IOU_THRESH = 0.45
+NMS_MAX_DET = 1000
+
+# columns of the arrays of detect_arrays(), and their structured view (see as_records)
+DETECTION_COLUMNS = ('x_center', 'y_center', 'width', 'height', 'confidence', 'class')
+DETECTION_DTYPE = np.dtype([(name, np.float32) for name in DETECTION_COLUMNS])
+
+
+#The Object returned when looking for detection
+class Detected:
+    __slots__ = ('x_center', 'y_center', 'width', 'height', 'confidence', 'label')
+
+    def __init__(self, x_center, y_center,width,height,confidence,label):
+        self.x_center = x_center
+        self.y_center = y_center
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.label = label
+
+    def __str__(self):
+        return f'x_center: {self.x_center}, y_center: {self.y_center}, width: {self.width}, height: {self.height}, confidence: {self.confidence}, label: {self.label}'
+
+
+def prepare_images(frames):
+    """
+    Puts the frames in the layout of the network: red, green and blue planes, padded to 128x160
+
+    :param frames: list of 120x160x3 BGR arrays returned by get_frame() (or [red, green, blue] arrays returned by get_camera())
+    :returns: N x 3 x 128 x 160 uint8 array
+    """
+    images = np.zeros((len(frames),) + INPUT_SHAPE, dtype=np.uint8)
+    for image, frame in zip(images, frames):
+        frame = np.asarray(frame)
+        if frame.shape[-1] == 3:
+            frame = frame[:, :, ::-1].transpose(2, 0, 1)
+        image[:, :frame.shape[1], :frame.shape[2]] = frame
+    return images
+
+
+def to_detected(array):
+    """
+    :param array: (n,6) array of an image given by detect_arrays()
+    :returns: list of Detected objects
+    """
+    return [Detected(x, y, w, h, conf, LABELS.get(int(cls), int(cls))) for x, y, w, h, conf, cls in array.tolist()]
+
+
+def as_records(array):
+    """
+    :param array: (n,6) array of an image given by detect_arrays()
+    :returns: the same data as a structured array of n records (no copy), e.g. records['confidence'], records[0]['class']
+    """
+    return np.ascontiguousarray(array, dtype=np.float32).view(DETECTION_DTYPE)[:, 0]
+
+
+def detect_arrays(loaded_model, frames, conf_thresh=0.9):
+    """
+    Runs the network once on all the frames (a single batch) and the non maximum suppression of all the images at once
+
+    :param loaded_model: the LoadedModel of the model registry (any backend)
+    :param frames: list of 120x160x3 BGR arrays returned by get_frame() (or [red, green, blue] arrays returned by get_camera())
+    :param conf_thresh: minimum confidence of the detections kept, applied before the non maximum suppression
+    :returns: list of (n,6) float32 arrays [x_center, y_center, width, height, confidence, class], one per frame,
+        sorted by decreasing confidence
+    """
+    if not len(frames):
+        return []
+
+    images = prepare_images(frames).astype(np.float32) / 255.0  # uint8 to fp32, 0 - 255 to 0.0 - 1.0
+    pred = loaded_model.backend(images)
+
+    # a box under conf_thresh only suppresses boxes of lower confidence: filtering first gives the same detections
+    conf_thresh = max(conf_thresh, NMS_CONF_THRESH)
+    if getattr(loaded_model.backend, 'uses_torch', True):
+        from .models.helper import batched_non_max_suppression
+        pred = [det.cpu().numpy() for det in batched_non_max_suppression(pred, conf_thresh, NMS_IOU_THRESH, max_det=NMS_MAX_DET)]
+    else:
+        # the ONNX backends give a NumPy array, the same suppression without importing torch and torchvision
+        from .nms import non_max_suppression
+        pred = non_max_suppression(np.asarray(pred, dtype=np.float32), conf_thresh, NMS_IOU_THRESH, max_det=NMS_MAX_DET)
+
+    # one conversion of the boxes of all the images, [xyxy, conf, cls] to [xywh, conf, cls]
+    det = np.concatenate(pred)
+    det[:, 2:4] -= det[:, 0:2]
+    det[:, 0:2] += det[:, 2:4] / 2
+    return np.split(det, np.cumsum([len(d) for d in pred])[:-1])
+
+
+def detect(loaded_model, frames, conf_thresh=0.9):
+    """
+    Same as detect_arrays(), with lists of Detected objects
+
+    :param loaded_model: the LoadedModel of the model registry (any backend)
+    :param frames: list of 120x160x3 BGR arrays returned by get_frame() (or [red, green, blue] arrays returned by get_camera())
+    :param conf_thresh: minimum confidence of the detections kept
+    :returns: list of lists of Detected objects, one list per frame
+    """
+    return [to_detected(array) for array in detect_arrays(loaded_model, frames, conf_thresh)]
+
+
+def label_to_color(label):
+    
+    if label == "Black Block":
+        return (0,0,0)
+    elif label == "Black Ball":
+        return (100,100,100)
+    elif label == "Red Block":
+        return (0,0,255)
+    elif label == "Blue Block":
+        return (255,0,0)
+    elif label == "Green Block":
+        return (0,255,0)
+    elif label == "Epuck":
+        return (0,255,255)
+    else:
+        return (random.randint(0,255),random.randint(0,255),random.randint(0,255))
+
+
+# draw a single bounding box onto a numpy array image
+def draw_bounding_box(img, detect):
+    import cv2
+    
+    floor = lambda x: x if x >= 0 else 0 
+    ceiling_x = lambda x: x if x <= 160 else 160
+    ceiling_y = lambda x: x if x <=120 else 120
+
+    
+    x_min, y_min = floor(int(detect.x_center - detect.width / 2)), floor(int(detect.y_center - detect.height / 2))
+    x_max, y_max = ceiling_x(int(detect.x_center + detect.width / 2)), ceiling_y(int(detect.y_center + detect.height / 2))
+    
+    label = detect.label
+    color = label_to_color(label)
+    conf = str(detect.confidence)
+   
+    cv2.rectangle(img,(x_min,y_min),(x_max,y_max), color, 2)
+    cv2.putText(img,str(label)+": "+conf,(x_min,y_min-10),cv2.FONT_HERSHEY_SIMPLEX,0.5,color,1)
+
+
+# draw all annotation bounding boxes on an image
+def plot_detection(img, detection):
+    for detect in detection:
+        draw_bounding_box(img, detect)
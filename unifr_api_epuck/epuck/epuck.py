@@ -1,5 +1,11 @@
 from ..communication.client_communication import ClientCommunication
 from ..communication.socket_client_communication import SocketClientCommunication
+from .loop_governor import LoopGovernor
+from .latency_stats import LatencyStats
+from .frame_ring import FrameRing
+from .image_writer import ImageWriter
+from .frame_store import FrameStore
+from .image_encoding import write_image, warn_write_error
 from multiprocessing.managers import SyncManager
 import time
 from math import sqrt, atan2, pi
@@ -42,6 +48,20 @@ class Epuck:
         self.NBR_CALIB = 50
         self.OFFSET_CALIB = 5
 
+        # rate of go_on() in Hz while sleep() waits, if no loop rate is set
+        self.SLEEP_RATE = 20
+        # fixed rate of go_on() (see set_loop_rate)
+        self._loop_governor = None
+        # durations of the phases of go_on() (see init_latency_stats)
+        self._latency_stats = None
+        # last frames of the camera (see init_frame_ring)
+        self._frame_ring = None
+        # background writer of the pictures (see init_image_writer)
+        self._image_writer = None
+        # dataset capture (see init_frame_store)
+        self.__frame_store = None
+        self.__frame_store_sensors = False
+
         self.host = None
         self.manager = None
         self.ClientCommunication = None
@@ -86,6 +106,11 @@ class Epuck:
         self.start_time = 0
         self.counter_img = 0
 
+        # images of live_camera() and live_detection() (see set_stream_format)
+        self.stream_format = 'jpeg'
+        self.stream_quality = 80
+        self.stream_save_image = False
+
         # dict for suppressing multiplication of warnings if not relevant 
         self.__printed_warnings = {}
 
@@ -114,6 +139,15 @@ class Epuck:
             Put it as a condition in a while loop.
             Then, if you would like to finish the infinite while loop, break inside.
         """
+        if self._loop_governor:
+            self._loop_governor.wait()
+
+        self._keep_host_alive()
+
+    def _keep_host_alive(self):
+        """
+        Keeps the host aware that the epuck is alive, if connected to a host (part of go_on() which never waits)
+        """
         try:
             if self.manager:
                 self.__stay_alive()
@@ -128,12 +162,74 @@ class Epuck:
         .. warning ::
             This implementation is to be preferred to the standard Python time.sleep() which can lead to problems in the sequence of event handling.
 
+        .. note::
+            go_on() is called at the loop rate (see :py:meth:`set_loop_rate()<.Epuck.set_loop_rate>`), 
+            or at SLEEP_RATE (20 Hz) if no loop rate is set.
+
         :param duration: duration in seconds
         """
+        loop_governor = self._loop_governor
+        if not loop_governor:
+            self._loop_governor = LoopGovernor(self.SLEEP_RATE)
 
-        time_finish = time.time()+duration
-        while time.time() < time_finish:
-            self.go_on()
+        try:
+            time_finish = time.monotonic()+duration
+            while time.monotonic() < time_finish:
+                self.go_on()
+        finally:
+            self._loop_governor = loop_governor
+
+    def set_loop_rate(self, rate):
+        """
+        Runs go_on() at a fixed rate: each call waits for the next period before exchanging with the robot.
+
+        :param rate: rate in Hz (None to run as fast as possible)
+        """
+        self._loop_governor = LoopGovernor(rate) if rate else None
+
+    def get_loop_stats(self):
+        """
+        Statistics of the rate of go_on() (see :py:meth:`set_loop_rate()<.Epuck.set_loop_rate>`) on the last 1000 calls
+
+        :returns: dict - target rate and achieved rate (Hz), median and 99th percentile of the jitter (delay after the deadline, in seconds), number of calls. None if no loop rate is set
+        """
+        if self._loop_governor:
+            return self._loop_governor.get_stats()
+        return None
+
+    def init_latency_stats(self):
+        """
+        Starts measuring the duration of each phase of go_on() (e.g. sending the command, waiting for the header, receiving the packet, decoding it).
+
+        .. note::
+            Only the real robots (Wi-Fi and Pi-puck) measure their phases.
+        """
+        self._latency_stats = LatencyStats()
+
+    def disable_latency_stats(self):
+        """
+        Stops measuring the phases of go_on() and forgets the measures.
+        """
+        self._latency_stats = None
+
+    def get_latency_stats(self):
+        """
+        Statistics of the durations of each phase of go_on() since init_latency_stats()
+
+        :returns: dict - {phase: {count, mean, min, max, p50, p90, p99}}, durations in seconds. None if not measuring
+        """
+        if self._latency_stats:
+            return self._latency_stats.get_stats()
+        return None
+
+    def dump_latency_stats(self, filename):
+        """
+        Writes the statistics and the histograms of the phases of go_on() in a JSON file
+
+        :param filename: path of the JSON file
+        """
+        if self._latency_stats:
+            self._latency_stats.dump_json(filename)
 
     def get_battery_level(self):
         """
@@ -527,6 +623,132 @@ class Epuck:
         """
         pass
 
+    def get_frame(self, out=None):
+        """
+        Gets the last image of the camera as a single contiguous array
+
+        .. code-block:: python
+
+            frame = robot.get_frame()
+            while robot.go_on():
+                robot.get_frame(out=frame)  # no allocation
+
+        :param out: optional preallocated HxWx3 uint8 array, filled and returned instead of allocating a new one
+        :returns: HxWx3 uint8 array (height, width, channels), channels in BGR order (like OpenCV)
+        """
+        pass
+
+    def init_frame_ring(self, capacity=30):
+        """
+        Keeps the last frames of the camera (as returned by get_frame()) with their time of capture, 
+        see :py:class:`FrameRing<unifr_api_epuck.epuck.frame_ring.FrameRing>`.
+
+        .. note::
+            The real e-puck and Webots add each new frame during go_on(), the Pi-puck each time the camera is read.
+
+        :param capacity: number of frames kept (at least 1)
+        """
+        self._frame_ring = FrameRing(capacity)
+
+    def disable_frame_ring(self):
+        """
+        Stops keeping the last frames of the camera
+        """
+        self._frame_ring = None
+
+    def get_frame_ring(self):
+        """
+        :returns: the :py:class:`FrameRing<unifr_api_epuck.epuck.frame_ring.FrameRing>` of the last frames (None if not initiated)
+        """
+        return self._frame_ring
+
+    def init_image_writer(self, workers=2, max_queue=64):
+        """
+        Writes the pictures (take_picture, save_detection, save_colordetection...) in background threads
+        instead of during the call, see :py:class:`ImageWriter<unifr_api_epuck.epuck.image_writer.ImageWriter>`.
+
+        .. note::
+            If more than max_queue pictures are waiting, the oldest ones are dropped.
+
+        :param workers: number of threads writing the pictures
+        :param max_queue: maximum number of pictures waiting to be written
+        """
+        if self._image_writer:
+            self._image_writer.close()
+        self._image_writer = ImageWriter(workers, max_queue)
+
+    def flush_images(self, timeout=None):
+        """
+        Waits until all the pictures given to the background writer are written (see init_image_writer)
+
+        :param timeout: maximum time to wait in seconds (None: no limit)
+        :returns: True if all the pictures are written
+        """
+        if self._image_writer:
+            return self._image_writer.flush(timeout)
+        return True
+
+    def _write_image(self, filename, frame, quality=95):
+        """
+        Writes a picture, in the background if init_image_writer() was called
+
+        :param filename: path of the picture, its extension gives the format
+        :param frame: HxWx3 uint8 BGR array, not modified afterwards
+        :param quality: between 1 and 100, for jpeg and webp
+        """
+        if self._image_writer:
+            self._image_writer.write(filename, frame, quality)
+            return
+
+        try:
+            write_image(filename, frame, quality)
+        except Exception as e:
+            warn_write_error(filename, e)
+
+    def init_frame_store(self, store, include_sensors=False, shape=None):
+        """
+        Starts a dataset capture: each store_frame() appends the current frame and its metadata to a
+        :py:class:`FrameStore<unifr_api_epuck.epuck.frame_store.FrameStore>` (one file for all the frames instead of one picture per frame).
+
+        .. note::
+            Several robots can capture in the same store: give them the same FrameStore object, the robot id is stored with each frame.
+
+        :param store: path of the folder of the store (created or appended to), or a FrameStore opened in 'a' mode
+        :param include_sensors: True to also store the proximity, ground and time of flight values (init_sensors() and init_ground() must be called)
+        :param shape: (height, width, 3) of the frames, by default the shape of the current frame (init_camera() and go_on() must be called)
+        """
+        if isinstance(store, str):
+            if shape is None:
+                frame = self.get_frame()
+                if frame is None:
+                    raise RuntimeError('No frame to create the store ' + store + ': call init_camera() and go_on() first, or give its shape')
+                shape = frame.shape
+            store = FrameStore(store, 'a', shape)
+        self.__frame_store = store
+        self.__frame_store_sensors = include_sensors
+
+    def store_frame(self):
+        """
+        Appends the current frame of the camera to the store of init_frame_store(), with the time, the robot id, the speeds and optionally the sensors
+
+        :returns: index of the frame in the store, None if no store is initiated
+        """
+        if self.__frame_store is None:
+            return None
+
+        metadata = {'robot_id': self.get_id(), 'speed': self.get_speed()}
+        if self.__frame_store_sensors:
+            metadata.update(prox=self.get_prox(), ground=self.get_ground(), tof=self.get_tof())
+        return self.__frame_store.append(self.get_frame(), **metadata)
+
+    def close_frame_store(self):
+        """
+        Stops the dataset capture and closes the store (the frames can then be loaded with np.load or FrameStore)
+        """
+        if self.__frame_store is not None:
+            self.__frame_store.close()
+            self.__frame_store = None
+
     def get_camera_width(self):
         return self.__camera_width
 
@@ -546,6 +768,19 @@ class Epuck:
         """
         pass
 
+    def set_stream_format(self, image_format='jpeg', quality=80, save_image=False):
+        """
+        Sets how the images of live_camera() and live_detection() are sent to the GUI.
+        The images are encoded in memory, they are only written in the image folder if save_image is True.
+
+        :param image_format: 'jpeg' or 'webp' ('png' and 'bmp' also work but are much bigger)
+        :param quality: between 1 and 100 (the smaller the faster, 80 by default)
+        :param save_image: True to also write the image of each step in the image folder (as before)
+        """
+        self.stream_format = image_format
+        self.stream_quality = quality
+        self.stream_save_image = save_image
+
 
     # return front, right, back. left microphones
     def get_microphones(self):
@@ -618,28 +853,91 @@ class Epuck:
     
   #####################################
 
-    def initiate_model(self,weights=None):
+    def initiate_model(self,weights=None, fuse=True, warmup=1, server=None, backend='eager'):
         """
         Initiate the network used to recognized blocks
         Need to be called once at the beginning
         :param weights: a .pt file containing new possible weights (default: the one trained by Vincent Carrel)
+        :param fuse: True to fuse the convolution and batch normalisation layers (faster inference)
+        :param warmup: number of passes run on an empty image after loading (0 for none)
+        :param server: True or 'host:port' to use the network of an inference server (python3 -m unifr_api_epuck.inference_server)
+        :param backend: 'eager' (PyTorch), 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8' (files exported by python3 -m unifr_api_epuck.export_model)
         .. warning:: 
             Only works with real robots
         """
         pass 
 
-    def get_detection(self,img = None,conf_thresh = 0.9):
+    def get_detection(self,img = None,conf_thresh = 0.9, raw=False):
         """
         Analyze the picture passed as img
         
         :param img: the 120x160x3 array containing a picture returned by the function get_picture
         :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :param raw: True for a (n,6) array [x_center, y_center, width, height, confidence, class] instead of Detected objects
         :return: array of Detected objects
         .. warning:: 
             Only works with real robots
         """
         pass
 
+    def get_detections(self, frames, conf_thresh=0.9, raw=False):
+        """
+        Analyzes several pictures at once, in a single pass of the network
+
+        :param frames: list of 120x160x3 BGR arrays returned by get_frame()
+        :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :param raw: True for (n,6) arrays [x_center, y_center, width, height, confidence, class] instead of Detected objects
+        :return: list of arrays of Detected objects, one for each frame
+        .. warning:: 
+            Only works with real robots
+        """
+        pass
+
+    def get_detection_async(self, img=None, conf_thresh=0.9):
+        """
+        Analyzes a picture in the background and returns immediately
+
+        :param img: the 120x160x3 BGR array returned by get_frame() (the last image of the camera if None)
+        :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :return: concurrent.futures.Future of the array of Detected objects
+        .. warning:: 
+            Only works with real robots
+        """
+        pass
+
+    def get_last_detection(self):
+        """
+        :return: array of Detected objects of the last picture analysed in the background, None if none yet
+        .. warning:: 
+            Only works with real robots
+        """
+        pass
+
+    def init_detection_gate(self, threshold=None, method='diff', max_skips=30):
+        """
+        live_detection() reuses the previous detections while the picture almost does not change (robot stopped or turning slowly),
+        see :py:class:`DetectionGate<unifr_api_epuck.epuck.detection_gate.DetectionGate>`
+
+        :param threshold: largest change of the picture which reuses the previous detections (default: 4.0 gray levels for 'diff', 10 bits for 'hash')
+        :param method: 'diff' (difference of the reduced pictures) or 'hash' (difference hash)
+        :param max_skips: number of pictures skipped in a row after which a picture is analysed anyway (None: no limit)
+        .. warning:: 
+            Only works with real robots
+        """
+        pass
+
+    def disable_detection_gate(self):
+        """
+        live_detection() analyses every picture again
+        """
+        pass
+
+    def get_detection_gate_stats(self):
+        """
+        :return: dict - hits (pictures skipped), misses (pictures analysed) and hit_rate of init_detection_gate(), None if not initiated
+        """
+        pass
+
     def save_detection(self,filename = None):
         """
         Save the annotated image either with a default name or the one given in filename
@@ -649,11 +947,12 @@ class Epuck:
         """
         pass
 
-    def live_detection(self,duration = None):
+    def live_detection(self,duration = None, asynchronous=False):
         """
         Lets you stream the annotated image from the GUI
         The live_detection method needs to be called at each step.
         :param duration: int - duration of the stream. (default: until program ends)
+        :param asynchronous: True to run the detection in the background, the image is annotated with the last detection available
         .. warning:: 
             Only works with real robots
         
@@ -0,0 +1,103 @@
+from .epuck import Epuck
+from .epuck_wifi import WifiEpuck
+from .packet_log import PacketLog
+import time
+
+
+class ReplayEpuck(WifiEpuck):
+    """
+    Replays a session recorded with :py:meth:`WifiEpuck.init_recording()<unifr_api_epuck.epuck.epuck_wifi.WifiEpuck.init_recording>`,
+    without robot.
+
+    Each call of go_on() hands the next recorded packet to the same code as a real e-puck,
+    so a controller can be run again on the recorded sensors and camera data.
+    The commands of the controller (motors, LEDs...) are not sent anywhere.
+
+    .. code-block:: python
+
+        from unifr_api_epuck import wrapper
+
+        r = wrapper.get_replay_robot('session.epucklog')
+        r.init_sensors()
+        while r.go_on():
+            print(r.get_prox())
+
+    :var log: the :py:class:`PacketLog<unifr_api_epuck.epuck.packet_log.PacketLog>` being replayed
+    """
+
+    def __init__(self, filename, realtime=True, loop=False):
+        """
+        :param filename: path of the log file
+        :param realtime: True to replay at the recorded speed, False to replay as fast as possible
+        :param loop: True to restart from the beginning at the end of the log
+        """
+        self.log = PacketLog(filename)
+        self.realtime = realtime
+        self.loop = loop
+
+        self.__index = 0
+        self.__start_time = None
+
+        super().__init__('replay')
+
+        if self.log.robot_id:
+            self.id = self.log.robot_id
+
+    def _connect(self):
+        # nothing to connect to
+        print('Replaying ' + str(len(self.log)) + ' packets of ' + self.log.robot_id)
+
+    def go_on(self):
+        """
+        * Takes the next recorded packet, waiting for its time of reception in realtime mode.
+
+        :returns: True if the packet contained camera or sensors data, False at the end of the log
+        """
+        # keeps the host aware that the epuck is alive
+        Epuck.go_on(self)
+
+        if self.__index >= len(self.log):
+            if not self.loop or not len(self.log):
+                return False
+            self.__index = 0
+            self.__start_time = None
+
+        timestamp, header, _, packet = self.log[self.__index]
+        self.__index += 1
+
+        if self.realtime:
+            now = time.monotonic()
+            if self.__start_time is None:
+                self.__start_time = now - (timestamp - self.log.timestamps[0])
+
+            delay = self.__start_time + (timestamp - self.log.timestamps[0]) - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self._command_sent()
+
+        buffer_view = self._packet_buffer(header)
+        if buffer_view is not None:
+            buffer_view[:] = packet
+
+        return self._packet_received(header)
+
+    def get_replay_position(self):
+        """
+        :returns: (index of the next packet, number of packets in the log)
+        """
+        return self.__index, len(self.log)
+
+    def init_pipeline(self):
+        """
+        .. warning::
+            Not available when replaying, the packets are already read without waiting.
+        """
+        print('Pipelined mode is not available for ReplayEpuck')
+
+    def clean_up(self):
+        """
+        Stops the replay.
+        """
+        self.disable_recording()
+        self.__index = len(self.log)
@@ -1,5 +1,6 @@
 #from unifr_api_epuck.epuck import *
 from .epuck import Epuck
+from .image_encoding import encode_image
 import time
 import socket
 from math import sqrt
@@ -81,6 +82,10 @@ class WebotsEpuck(Epuck):
         super().go_on()
         self.__robot.step(self.TIME_STEP)
 
+        if self._frame_ring is not None and self.camera.getSamplingPeriod():
+            self.get_frame(out=self._frame_ring.slot((self.__camera_height, self.__camera_width, 3)))
+            self._frame_ring.commit()
+
         return True
 
     def sleep(self, duration):
@@ -381,6 +386,17 @@ class WebotsEpuck(Epuck):
         
         return [red, green, blue]
 
+    def get_frame(self, out=None):
+        # the raw image of Webots is BGRA, row by row
+        image = np.frombuffer(self.camera.getImage(), dtype=np.uint8)
+        bgr = image.reshape(self.__camera_height, self.__camera_width, 4)[:, :, :3]
+
+        if out is None:
+            return np.ascontiguousarray(bgr)
+
+        np.copyto(out, bgr)
+        return out
+
     # https://www.cyberbotics.com/doc/reference/camera?tab-language=python
     def take_picture(self, filename = None):
         """
@@ -390,10 +406,15 @@ class WebotsEpuck(Epuck):
             if not filename:
                 counter = '{:04d}'.format(self.counter_img)
                 save_as = self.__save_image_folder+ '/'+self.get_id()+'_image'+ counter +  '.png'
-                self.camera.saveImage(save_as,100)  # 100 for best quality
                 self.counter_img += 1
             else:
-                self.camera.saveImage(self.__save_image_folder+'/'+filename +'.png',100)
+                save_as = self.__save_image_folder+'/'+filename +'.png'
+
+            if self._image_writer:
+                # encoded and written in the background (see init_image_writer)
+                self._write_image(save_as, self.get_frame())
+            else:
+                self.camera.saveImage(save_as,100)  # 100 for best quality
 
         except Exception as e:
             print(e)
@@ -413,15 +434,14 @@ class WebotsEpuck(Epuck):
         
         if live_time is None or (self.current_time - self.start_time) < live_time:
             try:
-                if self.ClientCommunication:
+                if self.stream_save_image:
                     save_as = self.__save_image_folder + '/'+ self.get_id() +'_image_video.png'
                     self.camera.saveImage(save_as, 100)  # 100 for best quality
-                    with open(save_as, 'rb') as f:
-                        image_data = f.read()
+
+                if self.ClientCommunication:
+                    # encoded in memory, see set_stream_format
+                    image_data = encode_image(self.get_frame(), self.stream_format, self.stream_quality)
                     self.ClientCommunication.stream_img(image_data) 
-                else:
-                    save_as = self.__save_image_folder + '/'+ self.get_id() +'_image_video.png'
-                    self.camera.saveImage(save_as, 100)  # 100 for best quality
                
                 self.counter_img += 1
             except Exception as e:
@@ -504,20 +524,21 @@ class WebotsEpuck(Epuck):
         for _ in range(50):
             self.set_speed(0, 0)
             self.go_on()
+        self.close_frame_store()
         #print('Robot cleaned')
 
 
 ######################################
 
 
-    def initiate_model(self,weights=None):
+    def initiate_model(self,weights=None, fuse=True, warmup=1, server=None, backend='eager'):
         pass 
 
-    def get_detection(self,img = None,conf_thresh = 0.9):
+    def get_detection(self,img = None,conf_thresh = 0.9, raw=False):
         pass
 
     def save_detection(self,filename = None):
         pass
 
-    def live_detection(self,duration = None):
+    def live_detection(self,duration = None, asynchronous=False):
         pass
\ No newline at end of file
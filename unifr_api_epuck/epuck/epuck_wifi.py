@@ -1,16 +1,18 @@
 from .epuck import Epuck
+from .packet_log import PacketRecorder
+from .image_encoding import encode_image
+from .model_registry import model_registry
+from .detector import Detected, plot_detection
+from .detection_gate import DetectionGate
 import struct
 import socket
 import sys
 import time
 import logging
 import numpy as np
-from .models.helper import non_max_suppression,plot_detection
-from .models.yolo import attempt_load
-import torch
 import os
-import cv2
 import signal
+import threading
 
 
 ###############
@@ -20,25 +22,8 @@ import signal
 #Needed for the detection
 #the model is the network with can be build with initiate_model()
 #it needs some path to the weights file
-#and the model itself is passed as global variable, so they can enable/disable the camera when needed without rebuilding the network
-
-model = None
-__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-sys.path.insert(0, __location__)
-
-#The Object returned when looking for detection
-class Detected:
-    def __init__(self, x_center, y_center,width,height,confidence,label):
-        self.x_center = x_center
-        self.y_center = y_center
-        self.width = width
-        self.height = height
-        self.confidence = confidence
-        self.label = label
-
-    def __str__(self):
-        return f'x_center: {self.x_center}, y_center: {self.y_center}, width: {self.width}, height: {self.height}, confidence: {self.confidence}, label: {self.label}'
-
+#and the model is kept in the model registry, loaded once and shared by all the robots of the process
+#torch, the network and cv2 are imported the first time they are needed, so a controller without detection starts quickly
 
 #The ColorDetected returned when looking for color detection
 class ColorDetected:
@@ -55,6 +40,35 @@ class ColorDetected:
 
 
 
+###############
+#   Sensors   #
+###############
+
+# Layout of the 104 bytes sensors packet sent by the e-puck (little endian).
+# The packet is decoded at once when it arrives, the getters only read the decoded values.
+SENSORS_PACKET_STRUCT = struct.Struct('<3h3f3h3fb8H8Hh4h2hHB3bB3H3HBB')
+
+# positions of the values in the decoded sensors packet
+SENSORS_ACC_AXES = slice(0, 3)          # bytes 0-5
+SENSORS_ACCELERATION = 3                # bytes 6-9
+SENSORS_ORIENTATION = 4                 # bytes 10-13
+SENSORS_INCLINATION = 5                 # bytes 14-17
+SENSORS_GYRO_AXES = slice(6, 9)         # bytes 18-23
+SENSORS_MAGNETOMETER = slice(9, 12)     # bytes 24-35
+SENSORS_TEMPERATURE = 12                # byte 36
+SENSORS_PROX = slice(13, 21)            # bytes 37-52
+SENSORS_AMBIENT = slice(21, 29)         # bytes 53-68
+SENSORS_TOF = 29                        # bytes 69-70
+SENSORS_MICROPHONES = slice(30, 34)     # bytes 71-78 (right, left, back, front)
+SENSORS_MOTORS_STEPS = slice(34, 36)    # bytes 79-82
+SENSORS_BATTERY = 36                    # bytes 83-84
+SENSORS_SD_STATE = 37                   # byte 85
+SENSORS_TV_REMOTE = slice(38, 41)       # bytes 86-88
+SENSORS_SELECTOR = 41                   # byte 89
+SENSORS_GROUND = slice(42, 45)          # bytes 90-95
+SENSORS_GROUND_AMBIENT = slice(45, 48)  # bytes 96-101
+SENSORS_BUTTON = 48                     # byte 102
+
 ###############
 
 class WifiEpuck(Epuck):
@@ -65,7 +79,7 @@ class WifiEpuck(Epuck):
         """
         A class used to represent a robot Real Robot.
 
-        :param ip_addr: str - The IP address of the e-puck
+        :param ip_addr: str - The IP address of the e-puck ('x.x.x.x:port' to use another TCP port than 1000)
         """
 
         ######################
@@ -77,19 +91,51 @@ class WifiEpuck(Epuck):
         self.SENSORS_PACKET_SIZE = 104
         self.IMAGE_PACKET_SIZE = 160 * 120 * 2  # Max buffer size = widthxheightx2
         self.MAX_NUM_CONN_TRIALS = 5
-        self.TCP_PORT = 1000  # This is fixed.
+        self.TCP_PORT = 1000  # This is fixed on the robot.
+
+        # another port can be given with the address, e.g. for the simulated robots of fake_epuck_server
+        if ':' in ip_addr:
+            self.ip_addr, port = ip_addr.rsplit(':', 1)
+            self.TCP_PORT = int(port)
+            self.id = ip_addr.replace('.', '_').replace(':', '_')
 
 
         # communication Robot <-> Computer
         self.__sock = 0
         self.__command = bytearray([0] * self.COMMAND_PACKET_SIZE)
+        self.__command_view = memoryview(self.__command)
+
+        # preallocated receive buffers, the socket writes directly into them (see __receive_part_from_robot)
+        self.__header = bytearray(self.HEADER_PACKET_SIZE)
+        self.__header_view = memoryview(self.__header)
+        self.__sensors_view = memoryview(bytearray(self.SENSORS_PACKET_SIZE))
+        self.sensors = self.__sensors_view
+        # decoded sensors packet, refreshed each time a new one arrives
+        self.__sensor_values = SENSORS_PACKET_STRUCT.unpack_from(self.__sensors_view)
+
+        # pipelined mode (see init_pipeline)
+        self.__pipeline_thread = None
+        self.__pipeline_running = False
+        self.__pipeline_lock = threading.Lock()
+        self.__pipeline_command = bytearray(self.COMMAND_PACKET_SIZE)
+
+        # packet recorder (see init_recording) and the last command sent, kept for the recorder
+        self.__recorder = None
+        self.__command_sent = bytearray(self.COMMAND_PACKET_SIZE)
+
+        # network of the detection, shared with the other robots (see initiate_model)
+        self.__model = None
+        # skips the detection of the pictures which did not change (see init_detection_gate), and the detection reused
+        self.__detection_gate = None
+        self.__gated_detection = None
  
 
         # camera init specific for Real Robot
         self.__camera_width = 160
         self.__camera_height = 120
-        self.__rgb565 = [0 for _ in range(self.IMAGE_PACKET_SIZE)]
-        self.__bgr888 = bytearray([0] * self.__camera_width*self.__camera_height*3*2)  # 160x120x3x2
+        self.__rgb565 = bytearray(self.IMAGE_PACKET_SIZE)
+        self.__rgb565_view = memoryview(self.__rgb565)
+        self.__bgr888 = np.zeros((self.__camera_height, self.__camera_width, 3), dtype=np.uint8)  # 120x160x3
         self.__camera_updated = False
         self.__my_filename_current_image = ''
         self.__save_image_folder='.'
@@ -99,8 +145,20 @@ class WifiEpuck(Epuck):
 
 
         # start communication with computer
-        self.__tcp_init()
         self.__init_command()
+        self._connect()
+
+    def _connect(self):
+        """
+        Opens the TCP connection with the robot and exchanges the first packets.
+
+        .. note::
+            Called once at the creation of the instance. 
+            Subclasses doing their own communication with the robot (e.g. AsyncWifiEpuck) override it.
+        """
+        self.__tcp_init()
+        self.go_on()
+        print('Battery left :'+ str(self.get_battery_level()))
 
         signal.signal(signal.SIGINT, self.__stopcontroller_handler)   
 
@@ -154,7 +212,7 @@ class WifiEpuck(Epuck):
 
     def __init_command(self):
         """
-        Initial command packet that is send to the e-puck once the first connection succeeded.
+        Initial command packet that is sent to the e-puck once the first connection succeeded.
         """
         # Init the array containing the commands to be sent to the robot.
         self.__command[0] = 0x80  # Packet id for settings actuators
@@ -179,9 +237,6 @@ class WifiEpuck(Epuck):
         self.__command[19] = 0  # LED8 blue
         self.__command[20] = 0  # speaker
 
-        self.go_on()
-        print('Battery left :'+ str(self.get_battery_level()))
-
     def get_id(self):
         """
         :returns: The ip address (replace the dots with underscores e.g: x_x_x_x)
@@ -201,70 +256,159 @@ class WifiEpuck(Epuck):
     ## COMMUNICATION METHODS between robot and master  ##
     #####################################################
 
-    def __send_to_robot(self):
+    def __send_to_robot(self, command_view):
         """
         Send a new packet from the computer to the robot
+
+        :param command_view: memoryview - the command packet to send
         """
         byte_send = 0
 
         # loop until all fragments of the packet has been sent
         while byte_send < self.COMMAND_PACKET_SIZE:
-            sent = self.__sock.send(self.__command[byte_send:])
+            sent = self.__sock.send(command_view[byte_send:])
             if sent == 0:
                 raise RuntimeError("Send to e-puck error")
 
             byte_send = byte_send + sent
 
-        # stop calibration
-        self.__command[2] = 0
-
-    def __receive_part_from_robot(self, msg_len):
+    def __receive_part_from_robot(self, buffer_view):
         """
         Receive a new packet from the robot to the computer
-        """
 
-        # receiving data in fragments
-        chunks = []
+        The packet is written in place into buffer_view (a memoryview on one of the
+        preallocated buffers), which is filled completely.
+
+        :param buffer_view: memoryview - destination of the packet
+        """
+        msg_len = len(buffer_view)
         bytes_recd = 0
         try:
             while bytes_recd < msg_len:
-                # old code
-                #chunk = self.__sock.recv(min(msg_len - bytes_recd, 2048))
-                #if chunk == b'':
-                #    raise RuntimeError("socket connection broken")
-            
                 trials = 0
-                chunk = b''
-                while chunk == b'':
+                received = 0
+                while received == 0:
                     trials += 1
-                    chunk = self.__sock.recv(min(msg_len - bytes_recd, 2048))
-                    if chunk == b'' and trials == self.MAX_NUM_CONN_TRIALS:
+                    received = self.__sock.recv_into(buffer_view[bytes_recd:])
+                    if received == 0 and trials == self.MAX_NUM_CONN_TRIALS:
                         raise RuntimeError("socket connection broken")
-                chunks.append(chunk)
-                bytes_recd = bytes_recd + len(chunk)
-            return b''.join(chunks)
+                bytes_recd = bytes_recd + received
         except:
             print('\033[91m'+'Lost connection of : ' +
                   str(self.get_ip())+'\033[0m')
             sys.exit(1)
 
+    def __receive_packet(self, rgb565_view, sensors_view):
+        """
+        Receives the next packet from the robot in the given buffers
+
+        :param rgb565_view: memoryview - destination of an image packet
+        :param sensors_view: memoryview - destination of a sensors packet
+        :returns: the header of the packet (1: image, 2: sensors)
+        """
+        latency_stats = self._latency_stats
+        if latency_stats:
+            start = latency_stats.clock()
+
+        # depending of the header, we know what data we receive
+        self.__receive_part_from_robot(self.__header_view)
+        header = self.__header[0]
+
+        if latency_stats:
+            start = latency_stats.record('header', start)
+
+        # camera information
+        if header == 1:
+            self.__receive_part_from_robot(rgb565_view)
+            if latency_stats:
+                latency_stats.record('payload_image', start)
+
+        # sensors information
+        elif header == 2:
+            self.__receive_part_from_robot(sensors_view)
+            if latency_stats:
+                latency_stats.record('payload_sensors', start)
+
+        return header
+
     def __receive_from_robot(self):
         """
         Receives the packet from the robot
         
         :returns: True if no problem occured
         """
-        # depending of the header, we know what data we receive
-        header = self.__receive_part_from_robot(self.HEADER_PACKET_SIZE)
+        header = self.__receive_packet(self.__rgb565_view, self.__sensors_view)
+
+        latency_stats = self._latency_stats
+        if latency_stats:
+            start = latency_stats.clock()
+            check_return = self._packet_received(header)
+            latency_stats.record('decode', start)
+            return check_return
+
+        return self._packet_received(header)
+
+    ##########################################
+    # PACKETS (shared with other transports) #
+    ##########################################
+    # Used by the classes talking to the robot without the blocking socket of WifiEpuck (e.g. AsyncWifiEpuck)
+
+    def _socket(self):
+        """
+        :returns: socket - the TCP socket connected to the robot
+        """
+        return self.__sock
+
+    def _command_packet(self):
+        """
+        :returns: bytearray - the command packet to send to the robot (21 bytes)
+        """
+        return self.__command
+
+    def _command_sent(self):
+        """
+        To be called once the command packet has been sent to the robot.
+        Resets the settings that must only be sent once (calibration and sound).
+        """
+        if self.__recorder:
+            self.__command_sent[:] = self.__command
+
+        self.__command[2] = 0
+        self.__command[20] = 0
+
+    def _packet_buffer(self, header):
+        """
+        :param header: int - header of the packet received from the robot
+        :returns: memoryview - where the packet following this header must be written (None if no packet follows)
+        """
+        if header == 1:
+            return self.__rgb565_view
+
+        if header == 2:
+            return self.__sensors_view
+
+        return None
+
+    def _packet_received(self, header):
+        """
+        To be called once the packet following header has been written in :py:meth:`_packet_buffer(header)<.WifiEpuck._packet_buffer>`.
+
+        :returns: True if the packet contained camera or sensors data
+        """
+        recorder = self.__recorder
+        if recorder:
+            packet_view = self._packet_buffer(header)
+            recorder.write(time.time(), header, self.__command_sent, packet_view if packet_view is not None else b'')
 
         # camera information
-        if header == bytearray([1]):
-            self.__rgb565 = self.__receive_part_from_robot(self.IMAGE_PACKET_SIZE)
+        if header == 1:
             self.__camera_updated = True
+            if self._frame_ring is not None:
+                self.__add_to_frame_ring()
 
         # sensors information
-        elif header == bytearray([2]):
-            self.sensors = self.__receive_part_from_robot(self.SENSORS_PACKET_SIZE)
+        elif header == 2:
+            self.__sensor_values = SENSORS_PACKET_STRUCT.unpack_from(self.__sensors_view)
 
         # no information
         else:
@@ -276,16 +420,195 @@ class WifiEpuck(Epuck):
         """
         * Sends and receives commands between computer and robot.
 
+        .. note::
+            In pipelined mode (see :py:meth:`init_pipeline<.WifiEpuck.init_pipeline>`), 
+            it only takes the latest data received and queues the command, without waiting for the robot.
+
         :returns: True (if no problem occurs)
         """
         super().go_on()
+
+        if self.__pipeline_thread:
+            return self.__pipeline_go_on()
+
+        latency_stats = self._latency_stats
+        if latency_stats:
+            start = latency_stats.clock()
+
         # check return is a boolean to say if all went ok.
-        self.__send_to_robot()
+        self.__send_to_robot(self.__command_view)
+        self._command_sent()
+
+        if latency_stats:
+            latency_stats.record('send', start)
+
         check_return = self.__receive_from_robot()
 
+        if latency_stats:
+            latency_stats.record('go_on', start)
+
 
         return check_return
 
+    ###################
+    # PIPELINED MODE  #
+    ###################
+
+    def init_pipeline(self):
+        """
+        Starts the pipelined mode.
+
+        A background thread keeps exchanging packets with the robot and keeps the latest sensors and camera data.
+        :py:meth:`go_on()<.WifiEpuck.go_on>` then only swaps in the latest data and queues the next command, 
+        so the controller runs at the speed of the computer instead of the speed of the Wi-Fi.
+
+        .. note::
+            The values returned by the getters can be the same between two calls of go_on() if the robot has not sent new data yet.
+        """
+        if self.__pipeline_thread:
+            return
+
+        # buffers written by the background thread (back) and handed over to go_on (ready)
+        self.__pipeline_command[:] = self.__command
+        self.__pipeline_sensors_back = memoryview(bytearray(self.SENSORS_PACKET_SIZE))
+        self.__pipeline_sensors_ready = bytearray(self.SENSORS_PACKET_SIZE)
+        self.__pipeline_sensor_values = None
+        self.__pipeline_rgb565_back = bytearray(self.IMAGE_PACKET_SIZE)
+        self.__pipeline_rgb565_ready = bytearray(self.IMAGE_PACKET_SIZE)
+        self.__pipeline_image_ready = False
+
+        self.__pipeline_running = True
+        self.__pipeline_thread = threading.Thread(target=self.__pipeline_loop, daemon=True)
+        self.__pipeline_thread.start()
+
+    def disable_pipeline(self):
+        """
+        Stops the pipelined mode, go_on() waits again for the answer of the robot.
+        """
+        if not self.__pipeline_thread:
+            return
+
+        self.__pipeline_running = False
+        self.__pipeline_thread.join()
+        self.__pipeline_thread = None
+        # take the last data received by the thread
+        self.__pipeline_swap()
+
+    def __pipeline_loop(self):
+        """
+        Loop of the background thread of the pipelined mode.
+        Sends the latest queued command and receives the answer of the robot in the back buffers.
+        """
+        command = bytearray(self.COMMAND_PACKET_SIZE)
+        command_view = memoryview(command)
+
+        try:
+            while self.__pipeline_running:
+                with self.__pipeline_lock:
+                    command[:] = self.__pipeline_command
+                    # calibration and sound are only sent once
+                    self.__pipeline_command[2] = 0
+                    self.__pipeline_command[20] = 0
+
+                latency_stats = self._latency_stats
+                if latency_stats:
+                    start = latency_stats.clock()
+
+                self.__send_to_robot(command_view)
+
+                if latency_stats:
+                    latency_stats.record('send', start)
+
+                header = self.__receive_packet(memoryview(self.__pipeline_rgb565_back), self.__pipeline_sensors_back)
+
+                recorder = self.__recorder
+                if recorder:
+                    packet = {1: self.__pipeline_rgb565_back, 2: self.__pipeline_sensors_back}.get(header, b'')
+                    recorder.write(time.time(), header, command, packet)
+
+                if header == 1:
+                    with self.__pipeline_lock:
+                        self.__pipeline_rgb565_back, self.__pipeline_rgb565_ready = self.__pipeline_rgb565_ready, self.__pipeline_rgb565_back
+                        self.__pipeline_image_ready = True
+
+                elif header == 2:
+                    if latency_stats:
+                        start = latency_stats.clock()
+                    sensor_values = SENSORS_PACKET_STRUCT.unpack_from(self.__pipeline_sensors_back)
+                    if latency_stats:
+                        latency_stats.record('decode', start)
+                    with self.__pipeline_lock:
+                        self.__pipeline_sensors_ready[:] = self.__pipeline_sensors_back
+                        self.__pipeline_sensor_values = sensor_values
+        except SystemExit:
+            # connection lost, go_on() stops the controller
+            pass
+
+    def __pipeline_swap(self):
+        """
+        Takes the latest data received by the background thread.
+        """
+        with self.__pipeline_lock:
+            if self.__pipeline_sensor_values:
+                self.__sensors_view[:] = self.__pipeline_sensors_ready
+                self.__sensor_values = self.__pipeline_sensor_values
+                self.__pipeline_sensor_values = None
+
+            if self.__pipeline_image_ready:
+                # the previous front buffer becomes the next ready buffer, no copy needed
+                self.__rgb565, self.__pipeline_rgb565_ready = self.__pipeline_rgb565_ready, self.__rgb565
+                self.__rgb565_view = memoryview(self.__rgb565)
+                self.__pipeline_image_ready = False
+                self.__camera_updated = True
+                if self._frame_ring is not None:
+                    self.__add_to_frame_ring()
+
+    def __pipeline_go_on(self):
+        """
+        go_on() of the pipelined mode
+        """
+        # the thread stops only if the connection is lost
+        if not self.__pipeline_thread.is_alive():
+            sys.exit(1)
+
+        self.__pipeline_swap()
+
+        with self.__pipeline_lock:
+            calibration = self.__pipeline_command[2]
+            sound = self.__pipeline_command[20]
+            self.__pipeline_command[:] = self.__command
+            # keep calibration and sound until they are sent by the thread
+            self.__pipeline_command[2] = self.__command[2] or calibration
+            self.__pipeline_command[20] = self.__command[20] or sound
+
+        self._command_sent()
+
+        return True
+
+    ###################
+    #    RECORDING    #
+    ###################
+
+    def init_recording(self, filename):
+        """
+        Starts recording every packet received from the robot (with the time of reception and the command sent before it)
+        in a binary log, which can be replayed later by :py:class:`ReplayEpuck<unifr_api_epuck.epuck.epuck_replay.ReplayEpuck>`
+        or read with :py:class:`PacketLog<unifr_api_epuck.epuck.packet_log.PacketLog>`.
+
+        :param filename: path of the log file (overwritten)
+        """
+        self.disable_recording()
+        self.__recorder = PacketRecorder(filename, self.get_id())
+
+    def disable_recording(self):
+        """
+        Stops recording the packets and closes the log file.
+        """
+        recorder = self.__recorder
+        self.__recorder = None
+        if recorder:
+            recorder.close()
+
     def sleep(self, duration):
         return super().sleep(duration)
 
@@ -293,8 +616,7 @@ class WifiEpuck(Epuck):
         """
         Gets robot's battery level.
         """
-        battery_level = struct.unpack("H", struct.pack("<BB", self.sensors[83], self.sensors[84]))[0]
-        return battery_level
+        return self.__sensor_values[SENSORS_BATTERY]
 
    
     def __set_speed_left(self, speed_left):
@@ -356,11 +678,7 @@ class WifiEpuck(Epuck):
         :returns: [left_wheel, right_wheel]
         :rtype: [int,int]
         """ 
-        left_steps = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[79], self.sensors[80]))[0]
-        right_steps = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[81], self.sensors[82]))[0]
-        return [left_steps, right_steps]
+        return list(self.__sensor_values[SENSORS_MOTORS_STEPS])
 
     #### begin ###
     #    LED     #
@@ -476,11 +794,7 @@ class WifiEpuck(Epuck):
 
 
     def get_prox(self):
-        # 2 byte per sensor, odd position is LSB and even position is MSB
-        prox_values = [struct.unpack(
-            "H", struct.pack("<BB", self.sensors[37+2*i], self.sensors[38+2*i]))[0] for i in range(self.PROX_SENSORS_COUNT)]
-
-        return prox_values
+        return list(self.__sensor_values[SENSORS_PROX])
 
     def calibrate_prox(self):
         return super().calibrate_prox()
@@ -492,7 +806,7 @@ class WifiEpuck(Epuck):
         pass
 
     def get_tof(self): 
-        return struct.unpack("h", struct.pack("<BB", self.sensors[69], self.sensors[70]))[0]
+        return self.__sensor_values[SENSORS_TOF]
 
     def disable_tof(self):
         return super().disable_tof()
@@ -504,11 +818,7 @@ class WifiEpuck(Epuck):
         pass
 
     def get_ground(self): 
-
-        ground_values = [struct.unpack(
-            "H", struct.pack("<BB", self.sensors[90+2*i], self.sensors[91+2*i]))[0] for i in range(self.GROUND_SENSORS_COUNT)]
-
-        return ground_values
+        return list(self.__sensor_values[SENSORS_GROUND])
 
     ###   BEGIN ##########
     #  Gyroscope         #
@@ -522,31 +832,19 @@ class WifiEpuck(Epuck):
     ######################
 
     def get_gyro_axes(self): 
-        gyro_x = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[18], self.sensors[19]))[0]
-        gyro_y = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[20], self.sensors[21]))[0]
-        gyro_z = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[22], self.sensors[23]))[0]
-        return [gyro_x, gyro_y, gyro_z]
+        return list(self.__sensor_values[SENSORS_GYRO_AXES])
 
     def get_accelerometer_axes(self): 
-        axe_x = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[0], self.sensors[1]))[0]
-        axe_y = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[2], self.sensors[3]))[0]
-        axe_z = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[4], self.sensors[5]))[0]
-        return [axe_x, axe_y, axe_z]
+        return list(self.__sensor_values[SENSORS_ACC_AXES])
 
     def get_acceleration(self): 
-        return struct.unpack("f", struct.pack("<BBBB", self.sensors[6], self.sensors[7], self.sensors[8], self.sensors[9]))[0]
+        return self.__sensor_values[SENSORS_ACCELERATION]
 
     def get_orientation(self): 
-        return struct.unpack("f", struct.pack("<BBBB", self.sensors[10], self.sensors[11], self.sensors[12], self.sensors[13]))[0]
+        return self.__sensor_values[SENSORS_ORIENTATION]
 
     def get_inclination(self): 
-        return struct.unpack("f", struct.pack("<BBBB", self.sensors[14], self.sensors[15], self.sensors[16], self.sensors[17]))[0]
+        return self.__sensor_values[SENSORS_INCLINATION]
 
 
     def get_roll(self):
@@ -571,14 +869,7 @@ class WifiEpuck(Epuck):
         :returns: [front, right, back, left]
         :rtype: array of int
         """ 
-        front = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[77], self.sensors[78]))[0]
-        right = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[71], self.sensors[72]))[0]
-        back = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[75], self.sensors[76]))[0]
-        left = struct.unpack("<h", struct.pack(
-            "<BB", self.sensors[73], self.sensors[74]))[0]
+        right, left, back, front = self.__sensor_values[SENSORS_MICROPHONES]
 
         return [front, right, back, left]
 
@@ -590,7 +881,7 @@ class WifiEpuck(Epuck):
         :returns: temperature
         :rtype: int (degree Celsius)
         """ 
-        return struct.unpack("b", struct.pack("<B", self.sensors[36]))[0]
+        return self.__sensor_values[SENSORS_TEMPERATURE]
 
 
 #https://students.iitk.ac.in/roboclub/2017/12/21/Beginners-Guide-to-IMU.html#:~:text=it%20a%20try!-,Gyroscope,in%20roll%2C%20pitch%20and%20yaw.    
@@ -606,11 +897,7 @@ class WifiEpuck(Epuck):
 
         returns: toggle, address, data
         """ 
-        toggle = struct.unpack("b", struct.pack("<B", self.sensors[86]))[0]
-        addr = struct.unpack("b", struct.pack("<B", self.sensors[87]))[0]
-        data = struct.unpack("b", struct.pack("<B", self.sensors[88]))[0]
-
-        return [toggle, addr, data]
+        return list(self.__sensor_values[SENSORS_TV_REMOTE])
 
 
 
@@ -630,67 +917,26 @@ class WifiEpuck(Epuck):
     ##############
 
     def __rgb565_to_bgr888(self):
-        counter = 0
-        for j in range(self.__camera_height):
-            for i in range(self.__camera_width):
-                index = 3 * (i + j * self.__camera_width)
-                red = self.__rgb565[counter]&0xF8
-                green = ((self.__rgb565[counter]&0x07) << 5) & 0xFF
-                counter += 1
-                green += ((self.__rgb565[counter]&0xE0) >> 3)
-                blue = ((self.__rgb565[counter]&0x1F) << 3) & 0xFF
-                counter += 1
-                self.__bgr888[index] = blue
-                self.__bgr888[index + 1] = green
-                self.__bgr888[index + 2] = red
+        """
+        Decodes the last RGB565 frame received from the robot into the BGR888 buffer.
+
+        Each pixel is sent as two bytes (big endian): rrrrrggg gggbbbbb.
+        The whole frame is decoded at once with NumPy instead of pixel per pixel.
+        """
+        rgb565 = np.frombuffer(self.__rgb565, dtype=np.uint8, count=self.__camera_width*self.__camera_height*2)
+        rgb565 = rgb565.reshape(self.__camera_height, self.__camera_width, 2)
+        high = rgb565[:, :, 0]
+        low = rgb565[:, :, 1]
+
+        np.left_shift(low & 0x1F, 3, out=self.__bgr888[:, :, 0])                          # blue
+        np.bitwise_or((high & 0x07) << 5, (low & 0xE0) >> 3, out=self.__bgr888[:, :, 1])  # green
+        np.bitwise_and(high, 0xF8, out=self.__bgr888[:, :, 2])                            # red
 
     def __save_bmp_image(self, filename):
-        width = self.__camera_width
-        height = self.__camera_height
-        image = self.__bgr888
-        filesize = 54 + 3 * width * height
-        # print("filesize = " + str(filesize))
-        bmpfileheader = bytearray(14)
-        bmpfileheader[0] = ord('B')
-        bmpfileheader[1] = ord('M')
-        bmpfileheader[2] = filesize & 0xFF
-        bmpfileheader[3] = (filesize >> 8) & 0xFF
-        bmpfileheader[4] = (filesize >> 16) & 0xFF
-        bmpfileheader[5] = (filesize >> 24) & 0xFF
-        bmpfileheader[6] = 0
-        bmpfileheader[7] = 0
-        bmpfileheader[8] = 0
-        bmpfileheader[9] = 0
-        bmpfileheader[10] = 54
-        bmpfileheader[11] = 0
-        bmpfileheader[12] = 0
-        bmpfileheader[13] = 0
-
-        bmpinfoheader = bytearray(40)
-        bmpinfoheader[0] = 40
-        bmpinfoheader[1] = 0
-        bmpinfoheader[2] = 0
-        bmpinfoheader[3] = 0
-        bmpinfoheader[4] = width & 0xFF
-        bmpinfoheader[5] = (width >> 8) & 0xFF
-        bmpinfoheader[6] = (width >> 16) & 0xFF
-        bmpinfoheader[7] = (width >> 24) & 0xFF
-        bmpinfoheader[8] = height & 0xFF
-        bmpinfoheader[9] = (height >> 8) & 0xFF
-        bmpinfoheader[10] = (height >> 16) & 0xFF
-        bmpinfoheader[11] = (height >> 24) & 0xFF
-        bmpinfoheader[12] = 1
-        bmpinfoheader[13] = 0
-        bmpinfoheader[14] = 24
-        bmpinfoheader[15] = 0
-
-        bmppad = bytearray(3)
-        with open(filename, 'wb') as file:
-            file.write(bmpfileheader)
-            file.write(bmpinfoheader)
-            for i in range(height):
-                file.write(image[(width * (height - i - 1) * 3):(width * (height - i - 1) * 3) + (3 * width)])
-                file.write(bmppad[0:((4 - (width * 3) % 4) % 4)])
+        """
+        Writes the last decoded frame as a BMP (in the background if init_image_writer() was called)
+        """
+        self._write_image(filename, self.__bgr888.copy())
 
     def init_camera(self, new_image_folder=None, size=(None, None)):
         super().init_camera()
@@ -711,25 +957,53 @@ class WifiEpuck(Epuck):
         super().disable_camera()
         self.__command[1] = self.__command[1] & 0xFE
 
-    def get_camera(self):
+    def __update_bgr888(self):
+        """
+        Decodes the last frame received, if not done yet
+        """
         if self.__camera_updated:
             if self.__my_filename_current_image:
+                latency_stats = self._latency_stats
+                if latency_stats:
+                    start = latency_stats.clock()
                 self.__rgb565_to_bgr888()
+                if latency_stats:
+                    latency_stats.record('decode_image', start)
 
             self.__camera_updated = False
 
-        #take r,g,b
-        red = self.__bgr888[2::3][:self.__camera_width*self.__camera_height]
-        green = self.__bgr888[1::3][:self.__camera_width*self.__camera_height]
-        blue = self.__bgr888[0::3][:self.__camera_width*self.__camera_height]
+    def __add_to_frame_ring(self):
+        """
+        Decodes the frame just received and adds it to the frame ring
+        """
+        self.__update_bgr888()
+        self._frame_ring.push(self.__bgr888)
 
-        #resize 1dim to array of 2dim  
-        red = np.array(red).reshape(self.__camera_height, self.__camera_width)
-        green = np.array(green).reshape(self.__camera_height, self.__camera_width)
-        blue = np.array(blue).reshape(self.__camera_height, self.__camera_width)
+    def get_camera(self):
+        self.__update_bgr888()
+
+        #take r,g,b (copies, so the next frame does not overwrite them)
+        red = self.__bgr888[:, :, 2].copy()
+        green = self.__bgr888[:, :, 1].copy()
+        blue = self.__bgr888[:, :, 0].copy()
 
         return [red, green, blue]
 
+    def get_frame(self, out=None):
+        """
+        Gets the last image of the camera as a single array
+
+        :param out: optional preallocated 120x160x3 uint8 array, filled and returned instead of allocating a new one
+        :returns: 120x160x3 uint8 array (height, width, channels), channels in BGR order (like OpenCV)
+        """
+        self.__update_bgr888()
+
+        if out is None:
+            return self.__bgr888.copy()
+
+        np.copyto(out, self.__bgr888)
+        return out
+
     def take_picture(self, filename = None):
         """
         Takes a picture and saves it in defined image folder from :py:meth:`init_camera<unifr_api_epuck.epuck_wifi.WifiEpuck.init_camera>`
@@ -763,11 +1037,12 @@ class WifiEpuck(Epuck):
 
         if duration is None or (self.current_time - self.start_time) < duration:
             # refresh robot communication
-            self.get_camera()
-            self.__save_bmp_image(self.__my_filename_current_image)
+            self.__update_bgr888()
+            if self.stream_save_image:
+                self.__save_bmp_image(self.__my_filename_current_image)
             if self.ClientCommunication:
-                with open(self.__my_filename_current_image, 'rb') as f:
-                    image_data = f.read()
+                # encoded in memory, see set_stream_format
+                image_data = encode_image(self.__bgr888, self.stream_format, self.stream_quality)
                 self.ClientCommunication.stream_img(image_data) 
           
         else:
@@ -850,6 +1125,7 @@ class WifiEpuck(Epuck):
         Disables all and closes socket.
         """
         if self.__sock != 0:
+            self.disable_pipeline()
             self.disable_camera()
             self.disable_all_led()
             self.disable_sensors()
@@ -862,6 +1138,8 @@ class WifiEpuck(Epuck):
 
             self.sleep(1)
 
+            self.disable_recording()
+            self.close_frame_store()
             self.__sock.close()
             sys.exit(0)
         #print('Robot cleaned')
@@ -880,37 +1158,52 @@ class WifiEpuck(Epuck):
     ####################
 
     #Call at the beginning of the session only
-    def initiate_model(self,weights=None):
-
-        global model
-
-        # Initialize
-
-        if weights is None:
-            weights = os.path.join(__location__,'best.pt')
-        device = 'cpu'        
+    def initiate_model(self,weights=None, fuse=True, warmup=1, server=None, backend='eager'):
+        """
+        Initiate the network used to recognized blocks.
+        The network is loaded once per process: the other robots initiating the same weights reuse it,
+        see :py:class:`ModelRegistry<unifr_api_epuck.epuck.model_registry.ModelRegistry>`.
+
+        :param weights: a .pt file containing new possible weights (default: the one trained by Vincent Carrel)
+        :param fuse: True to fuse the convolution and batch normalisation layers (faster inference)
+        :param warmup: number of passes run on an empty image after loading, so the first detection is not slower (0 for none)
+        :param server: True or 'host:port' to use the network of an inference server instead of loading it
+            (python3 -m unifr_api_epuck.inference_server, see :py:class:`InferenceClient<unifr_api_epuck.epuck.inference_client.InferenceClient>`).
+            weights, fuse, warmup and backend are then ignored: they are the options of the server (--weights, --backend...).
+        :param backend: 'eager' (PyTorch, default), 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8' (8 bits integers, faster on the CPU). The last four need the files
+            exported from the weights (python3 -m unifr_api_epuck.export_model), the ONNX backends do not import torch nor torchvision,
+            see :py:mod:`inference_backends<unifr_api_epuck.epuck.inference_backends>`
+        :returns: dict - load_time, warmup_time (seconds) and memory (bytes) of the network, see LoadedModel.get_stats()
+        """
+        device = 'cpu'
 
-        # Load model
+        if server:
+            self.__model = model_registry.get_client(None if server is True else server)
+            stats = self.__model.get_stats()
+            print("model initialized, using the inference server " + stats['server'])
+            return stats
 
-        model = attempt_load(weights, map_location=device)  # load FP32 model
-        print("model initialized, ready to use")
+        # Load model (FP32), or reuse the one already loaded
+        self.__model = model_registry.get(weights, device, fuse, warmup, backend)
+        stats = self.__model.get_stats()
+        print("model initialized, ready to use ({} backend loaded in {:.2f}s, {:.1f}MB)".format(stats['backend'], stats['load_time'], stats['memory'] / 1e6))
+        return stats
 
 
-    def get_detection(self,img = None,conf_thresh = 0.9):
+    def get_detection(self,img = None,conf_thresh = 0.9, raw=False):
         """
         Analyze the picture passed as img
         
-        :param img: the 120x160x3 array containing a picture returned by the function get_picture
+        :param img: the 120x160x3 BGR array returned by get_frame() (or the [red, green, blue] arrays returned by get_camera())
         :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :param raw: True for a (n,6) float32 array [x_center, y_center, width, height, confidence, class] instead of Detected objects
+            (faster, see :py:func:`as_records<unifr_api_epuck.epuck.detector.as_records>` for named columns)
         :return: array of Detected objects
         .. warning:: 
             Only works with real robots
         """
 
-        global model
-        device = 'cpu'
-
-        if model is None:
+        if self.__model is None:
             print("You forgot to initialyse the network")
             return
 
@@ -918,47 +1211,103 @@ class WifiEpuck(Epuck):
             print("Give a picture to analyse")
             return
 
-        #add padding
-        temp = np.zeros((3,8,160),dtype='uint8')
-        img = np.append(img, temp, axis=1)
+        if raw:
+            return self.__model.detect_arrays([img], conf_thresh)[0]
+        return self.__model.detect([img], conf_thresh)[0]
+
+    def get_detections(self, frames, conf_thresh=0.9, raw=False):
+        """
+        Analyzes several pictures at once (e.g. the frames of all the robots of a fleet):
+        the network runs once on the batch of pictures, which is faster than calling get_detection() for each one
 
-        # Run inference
-        img = torch.from_numpy(img).to(device)
-        img = img.float()  # uint8 to fp32
-        img = img / 255.0  # 0 - 255 to 0.0 - 1.0
+        :param frames: list of 120x160x3 BGR arrays returned by get_frame()
+        :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :param raw: True for (n,6) float32 arrays [x_center, y_center, width, height, confidence, class] instead of Detected objects
+            (faster, see :py:func:`as_records<unifr_api_epuck.epuck.detector.as_records>` for named columns)
+        :return: list of arrays of Detected objects, one for each frame
+        """
+        if self.__model is None:
+            print("You forgot to initialyse the network")
+            return
 
-        if len(img.shape) == 3:
-            img = img[None]  # expand for batch dim
+        if raw:
+            return self.__model.detect_arrays(frames, conf_thresh)
+        return self.__model.detect(frames, conf_thresh)
 
-        #Use the model to predict 
-        pred = model(img, augment=False, visualize=False)[0]
-        pred = non_max_suppression(pred, 0.25, 0.45, None, False, max_det=1000)
+    def get_detection_async(self, img=None, conf_thresh=0.9):
+        """
+        Analyzes a picture in the background and returns immediately, so go_on() keeps running at full rate during the detection.
+        The robots using the same network share one background thread, see :py:class:`InferenceWorker<unifr_api_epuck.epuck.inference_worker.InferenceWorker>`.
 
-        #Result processing (manipulating Pytorch tensor to numpy array of Object)
-        [tensor_temp] = pred
-        rep = []
-        choices = {0: "Red Block", 1: "Black Block",2:"Black Ball",3:"Blue Block",4:"Epuck",5:"Green Block"}
+        .. code-block:: python
 
-        for det in tensor_temp:
+            future = robot.get_detection_async()
+            while robot.go_on():
+                if future.done():
+                    detection = future.result()
+                    future = robot.get_detection_async()
 
-            conf = det[4].item()
+        .. note::
+            If the previous picture of the robot is still waiting, it is replaced by this one (its future is cancelled).
 
-            #Added test, to remove all the low confidence predictions, according to the report
-            if conf < conf_thresh:
-                continue
+        :param img: the 120x160x3 BGR array returned by get_frame() (the last image of the camera if None)
+        :param conf_thresh: an artifical threshold to limit the detections only to a certain confidence level
+        :return: concurrent.futures.Future of the array of Detected objects
+        """
+        if self.__model is None:
+            print("You forgot to initialyse the network")
+            return
 
-            det = det.numpy()
+        # a copy, the worker reads it later
+        img = self.get_frame() if img is None else np.array(img)
+        return self.__model.get_inference_worker().submit(img, conf_thresh, self.get_id())
 
-            x = (det[0] + det[2]) / 2
-            y = (det[1] + det[3]) / 2
-            w = det[2] - det[0]
-            h = det[3] - det[1]
+    def get_last_detection(self):
+        """
+        Gets the result of the last picture analysed in the background (see get_detection_async), without waiting
+
+        :return: array of Detected objects, None if no picture was analysed yet
+        """
+        if self.__model is None:
+            return None
+
+        latest = self.__model.get_inference_worker().get_latest(self.get_id())
+        return latest[0] if latest else None
+
+    def init_detection_gate(self, threshold=None, method='diff', max_skips=30):
+        """
+        live_detection() reuses the previous detections while the picture almost does not change (robot stopped or turning slowly),
+        instead of running the network on each picture, see :py:class:`DetectionGate<unifr_api_epuck.epuck.detection_gate.DetectionGate>`
 
-            cls = choices.get(int(det[5]), int(det[5]))
+        .. code-block:: python
 
-            rep.append(Detected(x_center=x,y_center=y,width=w,height=h,confidence=conf,label=cls))
+            robot.initiate_model()
+            robot.init_detection_gate()
+            while robot.go_on():
+                robot.live_detection()
+            print(robot.get_detection_gate_stats()['hit_rate'])
+
+        :param threshold: largest change of the picture which reuses the previous detections (default: 4.0 gray levels for 'diff', 10 bits for 'hash')
+        :param method: 'diff' (difference of the reduced pictures) or 'hash' (difference hash)
+        :param max_skips: number of pictures skipped in a row after which a picture is analysed anyway (None: no limit)
+        """
+        self.__detection_gate = DetectionGate(threshold, method, max_skips)
+        self.__gated_detection = None
+
+    def disable_detection_gate(self):
+        """
+        live_detection() analyses every picture again
+        """
+        self.__detection_gate = None
+        self.__gated_detection = None
 
-        return rep or []
+    def get_detection_gate_stats(self):
+        """
+        :return: dict - hits (pictures skipped), misses (pictures analysed) and hit_rate of init_detection_gate(), None if not initiated
+        """
+        if self.__detection_gate:
+            return self.__detection_gate.get_stats()
+        return None
 
     #Take a picture, analyse it and save the anotated picture in the defined image folder
     def save_detection(self,filename = None):
@@ -970,15 +1319,10 @@ class WifiEpuck(Epuck):
         """
 
         #Take the picture
-        img = self.get_camera()
-        img = np.array(img)
+        bgr_img = self.get_frame()
 
         #Get the detection
-        detection = self.get_detection(img,conf_thresh = 0.1)
-
-        #Need some work on the picture to save it
-        img_copy = img.transpose(1,2,0).astype(np.uint8).copy()
-        bgr_img = cv2.cvtColor(img_copy, cv2.COLOR_RGB2BGR)
+        detection = self.get_detection(bgr_img,conf_thresh = 0.1)
 
         #plot detection
         plot_detection(bgr_img,detection)
@@ -987,7 +1331,7 @@ class WifiEpuck(Epuck):
 
             counter = '{:04d}'.format(self.__counter_detec_img)
 
-            cv2.imwrite(self.__save_image_folder+'/'+self.get_id() +'_detected_image_'+ counter + '.bmp',bgr_img)
+            self._write_image(self.__save_image_folder+'/'+self.get_id() +'_detected_image_'+ counter + '.bmp',bgr_img)
 
             self.__counter_detec_img += 1
 
@@ -995,13 +1339,17 @@ class WifiEpuck(Epuck):
             if not '.bmp' in filename:
                 filename+='.bmp'
 
-            cv2.imwrite(self.__save_image_folder+'/'+filename,bgr_img)
+            self._write_image(self.__save_image_folder+'/'+filename,bgr_img)
 
-    def live_detection(self,duration=None):
+    def live_detection(self,duration=None, asynchronous=False):
         """
         Lets you stream the annotated image from the GUI
         The live_detection method needs to be called at each step.
         :param duration: int - duration of the stream. (default: until program ends)
+        :param asynchronous: True to run the detection in the background (see get_detection_async): the call does not wait for the network
+            and the image is annotated with the last detection available
+        .. note::
+            With init_detection_gate(), the pictures which almost did not change are annotated with the previous detection, without running the network.
         .. warning:: 
             Only works with real robots
         
@@ -1017,22 +1365,32 @@ class WifiEpuck(Epuck):
 
         if duration is None or (self.current_time - self.start_time) < duration:
             # refresh robot communication
-            img = self.get_camera()
-            img = np.array(img)
-
-            detection = self.get_detection(img)
+            bgr_img = self.get_frame()
+
+            # the previous detection while the picture does not change
+            gate = self.__detection_gate
+            skip = gate is not None and not gate.changed(bgr_img)
+
+            if asynchronous:
+                if not skip:
+                    self.get_detection_async(bgr_img)
+                detection = self.get_last_detection() or []
+            elif skip and self.__gated_detection is not None:
+                detection = self.__gated_detection
+            else:
+                detection = self.get_detection(bgr_img)
+                if gate is not None:
+                    self.__gated_detection = detection
 
-            img_copy = img.transpose(1,2,0).astype(np.uint8).copy()
-            bgr_img = cv2.cvtColor(img_copy, cv2.COLOR_RGB2BGR)
             plot_detection(bgr_img,detection)
 
             #overwrite always the same picture
-            cv2.imwrite(self.__save_image_folder+'/'+self.get_id()+'_image_video.bmp',bgr_img)
-            save = self.__save_image_folder+'/'+self.get_id()+'_image_video.bmp'
+            if self.stream_save_image:
+                self._write_image(self.__save_image_folder+'/'+self.get_id()+'_image_video.bmp',bgr_img)
 
             if self.ClientCommunication:
-                with open(save,"rb") as f:
-                    image_data = f.read()
+                # encoded in memory, see set_stream_format
+                image_data = encode_image(bgr_img, self.stream_format, self.stream_quality)
                 self.ClientCommunication.stream_img(image_data)
 
         else:
@@ -1057,7 +1415,7 @@ class WifiEpuck(Epuck):
             Only works with real robots
         """
 
-        b,g,r = cv2.split(img)
+        b,g,r = img[:, :, 0], img[:, :, 1], img[:, :, 2]
         # change type to allow pixel operations 
         b = b.astype(np.int16)
         g = g.astype(np.int16)
@@ -1096,17 +1454,23 @@ class WifiEpuck(Epuck):
 
         return [red_mask, green_mask, blue_mask, black_mask, white_mask, gray_mask]
      
-    def erosion(self,img, size = 2, shape = cv2.MORPH_RECT):
-        #shape =  cv.MORPH_RECT
+    def erosion(self,img, size = 2, shape = None):
+        #shape =  cv.MORPH_RECT (default)
         #shape =  cv.MORPH_CROSS
         #shape =  cv.MORPH_ELLIPSE
+        import cv2
+        if shape is None:
+            shape = cv2.MORPH_RECT
         element = cv2.getStructuringElement(shape, (2 * size + 1, 2 * size + 1),(size, size))
         return  cv2.erode(img, element)
 
-    def dilatation(self,img, size = 2, shape = cv2.MORPH_RECT):
-        #shape =  cv.MORPH_RECT
+    def dilatation(self,img, size = 2, shape = None):
+        #shape =  cv.MORPH_RECT (default)
         #shape =  cv.MORPH_CROSS
         #shape =  cv.MORPH_ELLIPSE
+        import cv2
+        if shape is None:
+            shape = cv2.MORPH_RECT
         element = cv2.getStructuringElement(shape, (2 * size + 1, 2 * size + 1),(size, size))
         return cv2.dilate(img, element)
      
@@ -1212,6 +1576,7 @@ class WifiEpuck(Epuck):
         
         """
         
+        import cv2
         binary = mask.astype(np.uint8)*255
 
         binary = self.mask_cleanup(binary)
@@ -1250,11 +1615,22 @@ class WifiEpuck(Epuck):
 
 
     def get_colordetection(self,img = None, min_area = 100, saveimg = False, savemasks = False, filename = None) :
+        """
+        Detects the blue, green, red and black objects of a picture
 
-        img_copy = img.transpose(1,2,0).astype(np.uint8).copy()
-        bgr_img = cv2.cvtColor(img_copy, cv2.COLOR_RGB2BGR)
+        :param img: the 120x160x3 BGR array returned by get_frame() (or the [red, green, blue] arrays returned by get_camera()), the last image of the camera if None
+        :returns: list of ColorDetected objects
+        """
+        if img is None:
+            bgr_img = self.get_frame()
+        else:
+            img = np.asarray(img)
+            if img.shape[-1] == 3:
+                bgr_img = np.ascontiguousarray(img, dtype=np.uint8)
+            else:
+                bgr_img = np.ascontiguousarray(img.transpose(1,2,0)[:, :, ::-1], dtype=np.uint8)
                 
-        cv2.imwrite('./img/feed.bmp',bgr_img)
+        self._write_image('./img/feed.bmp',bgr_img.copy())
         
         # TODO replace Ali's detection with opencv masks
         #masks = [r,g,b,k,w,j] = self.detect_color_masks(img, 15, 49)
@@ -1278,7 +1654,7 @@ class WifiEpuck(Epuck):
             filename+='.bmp'
 
         if saveimg :
-            cv2.imwrite(self.__save_image_folder+'/'+'colordetection_'+filename,img_cont)
+            self._write_image(self.__save_image_folder+'/'+'colordetection_'+filename,img_cont)
 
         if savemasks :
 
@@ -1290,7 +1666,7 @@ class WifiEpuck(Epuck):
             for i,m in enumerate(masks):
                 allmasks = allmasks + self.color_img_from_mask(m,out_colors[i],(0,0,0))
 
-            cv2.imwrite(self.__save_image_folder+'/'+'colordetection_masks_'+filename,allmasks)
+            self._write_image(self.__save_image_folder+'/'+'colordetection_masks_'+filename,allmasks)
 
         return allcontours
         
@@ -1309,9 +1685,8 @@ class WifiEpuck(Epuck):
 
     def live_colordetection(self,img = None, min_area = 100, savemasks = True) :
     
-        if (not img) :
-            img = self.get_camera()
-            img = np.array(img)
+        if img is None:
+            img = self.get_frame()
             
         self.get_colordetection(img, min_area = min_area, saveimg = True, savemasks = savemasks, filename = self.get_id())
 
@@ -0,0 +1,250 @@
+from .epuck_wifi import WifiEpuck
+from .loop_governor import LoopGovernor
+import asyncio
+import logging
+import time
+import numpy as np
+
+
+class AsyncWifiEpuck(WifiEpuck):
+    """
+    A real e-puck controlled over Wi-Fi with asyncio.
+
+    It speaks the same TCP protocol as :py:class:`WifiEpuck<unifr_api_epuck.epuck.epuck_wifi.WifiEpuck>`
+    (21 bytes command, 1 byte header, then a sensors or an image packet) but with asyncio streams,
+    so one event loop can control many robots at the same time.
+
+    The methods exchanging packets with the robot (connect, go_on, sleep, calibrate_prox, sounds and clean_up)
+    must be awaited. The other methods (motors, LEDs, sensors getters, camera...) are the same as WifiEpuck.
+
+    .. code-block:: python
+
+        import asyncio
+        from unifr_api_epuck import wrapper
+
+        async def controller(ip_addr):
+            r = await wrapper.get_async_robot(ip_addr)
+            r.init_sensors()
+            r.set_speed(2)
+            while await r.go_on():
+                print(r.get_id(), r.get_prox())
+
+        async def main():
+            await asyncio.gather(controller('192.168.43.125'), controller('192.168.43.126'))
+
+        asyncio.run(main())
+    """
+
+    def __init__(self, ip_addr):
+        """
+        Initiates the robot, the connection is opened by :py:meth:`connect()<.AsyncWifiEpuck.connect>`
+
+        :param ip_addr: str - The IP address of the e-puck
+        """
+        # time in seconds before giving up on a connection or a packet
+        self.TIMEOUT = 10
+
+        self.__reader = None
+        self.__writer = None
+
+        super().__init__(ip_addr)
+
+    def _connect(self):
+        # the connection is opened by connect(), which must be awaited
+        pass
+
+    async def connect(self):
+        """
+        Opens the TCP connection with the robot and exchanges the first packets.
+
+        :raises ConnectionError: if the robot cannot be reached after MAX_NUM_CONN_TRIALS trials
+        """
+        ip_address = self.ip_addr
+        print("Try to connect to " + ip_address +
+              ":" + str(self.TCP_PORT) + " (TCP)")
+
+        for _ in range(self.MAX_NUM_CONN_TRIALS):
+            try:
+                self.__reader, self.__writer = await asyncio.wait_for(
+                    asyncio.open_connection(ip_address, self.TCP_PORT), self.TIMEOUT)
+                break
+            except asyncio.TimeoutError as err:
+                logging.error("Timeout error from " + ip_address + ":")
+                logging.error(err)
+            except OSError as err:
+                logging.error("OS error from " + ip_address + ":")
+                logging.error(err)
+        else:
+            raise ConnectionError("Can't connect to " + ip_address)
+
+        print("Connected to " + ip_address)
+
+        await self.go_on()
+        print('Battery left :'+ str(self.get_battery_level()))
+        print("Robot initialized")
+
+    #####################################################
+    ## COMMUNICATION METHODS between robot and master  ##
+    #####################################################
+
+    async def __receive_from_robot(self):
+        """
+        Receives the packet from the robot
+
+        :returns: True if no problem occured
+        """
+        header = (await self.__reader.readexactly(self.HEADER_PACKET_SIZE))[0]
+
+        buffer_view = self._packet_buffer(header)
+        if buffer_view is not None:
+            buffer_view[:] = await self.__reader.readexactly(len(buffer_view))
+
+        return self._packet_received(header)
+
+    async def go_on(self):
+        """
+        * Sends and receives commands between computer and robot.
+
+        .. note::
+            Unlike WifiEpuck, a lost connection does not stop the program (other robots of the event loop keep running),
+            a ConnectionError is raised instead.
+
+        :returns: True (if no problem occurs)
+        """
+        # waits for the next period without blocking the event loop (see set_loop_rate)
+        if self._loop_governor:
+            await asyncio.sleep(self._loop_governor.delay())
+            # starts the iteration even if the event loop woke up a bit early, never sleeping in the event loop
+            self._loop_governor.tick()
+
+        # keeps the host aware that the epuck is alive
+        self._keep_host_alive()
+
+        try:
+            self.__writer.write(self._command_packet())
+            self._command_sent()
+            await asyncio.wait_for(self.__writer.drain(), self.TIMEOUT)
+            return await asyncio.wait_for(self.__receive_from_robot(), self.TIMEOUT)
+
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError) as err:
+            print('\033[91m'+'Lost connection of : ' +
+                  str(self.get_ip())+'\033[0m')
+            raise ConnectionError('Lost connection of ' + str(self.get_ip())) from err
+
+    async def sleep(self, duration):
+        """
+        Pause the execution during *duration* seconds, while still exchanging packets with the robot.
+
+        :param duration: duration in seconds
+        """
+        loop_governor = self._loop_governor
+        if not loop_governor:
+            self._loop_governor = LoopGovernor(self.SLEEP_RATE)
+
+        try:
+            time_finish = time.monotonic()+duration
+            while time.monotonic() < time_finish:
+                await self.go_on()
+        finally:
+            self._loop_governor = loop_governor
+
+    def init_pipeline(self):
+        """
+        .. warning::
+            Not available with asyncio, go_on() already lets the other robots of the event loop run while waiting.
+        """
+        print('Pipelined mode is not available for AsyncWifiEpuck')
+
+    async def calibrate_prox(self):
+        """
+        Adjust the sensors to make them as error free as possible
+
+        .. note::
+            When all LEDs are ON, it indicates that the sensors are calibrating.
+        """
+        print(self.get_id() + ' start calibrating IR proximity')
+
+        # enable light as witness
+        self.enable_all_led()
+
+        for _ in range(10):
+            await self.go_on()
+
+        sums_per_sensor = np.array([0]*self.PROX_SENSORS_COUNT)
+        # get multiple readings for each sensor
+        for i in range(self.NBR_CALIB + self.OFFSET_CALIB):
+            await self.go_on()
+            if i > self.OFFSET_CALIB:
+                sums_per_sensor = sums_per_sensor + self.get_prox()
+
+        # calculate the average for each sensor
+        self.ps_err = sums_per_sensor/self.NBR_CALIB
+
+        self.disable_all_led()
+        for _ in range(10):
+            await self.go_on()
+
+        print(self.get_id() + ' finish calibrating IR proximity')
+
+    #### start ####
+    #    MUSIC  #
+    ##############
+
+    async def play_sound(self, sound_number):
+        """
+        Plays the corresponded music of the sound_number
+
+        1. Plays main Mario's theme
+        2. Plays underworld Mario's theme
+        3. Plays Star Wars theme
+
+        :param sound_number: int - (between 1 and 3, any other value stops the sound)
+        """
+        switcher = {
+            1: self.play_mario,
+            2: self.play_underworld,
+            3: self.play_star_wars
+        }
+
+        func = switcher.get(sound_number, self.stop_sound)
+        await func()
+
+    async def __play(self, sound):
+        # the sound byte is reset once sent (see _command_sent)
+        self._command_packet()[20] = sound
+        await self.go_on()
+
+    async def play_mario(self):
+        await self.__play(0x01)
+
+    async def play_underworld(self):
+        await self.__play(0x02)
+
+    async def play_star_wars(self):
+        await self.__play(0x04)
+
+    async def stop_sound(self):
+        await self.__play(0x20)
+
+    ####  END ####
+    #    SOUND   #
+    ##############
+
+    async def clean_up(self):
+        """
+        Disables all and closes the connection.
+        """
+        if self.__writer:
+            self.disable_camera()
+            self.disable_all_led()
+            self.disable_sensors()
+            self.disable_front_led()
+            self.disable_body_led()
+
+            for _ in range(10):
+                self.set_speed(0, 0)
+                await self.go_on()
+
+            self.__writer.close()
+            await self.__writer.wait_closed()
+            self.__writer = None
@@ -0,0 +1,246 @@
+from .epuck import Epuck
+from .epuck_wifi import WifiEpuck
+from .loop_governor import LoopGovernor
+from .model_registry import model_registry
+import selectors
+import signal
+import sys
+import time
+
+
+class Fleet:
+    """
+    A group of real e-pucks controlled over Wi-Fi from a single Python program.
+
+    Each call of :py:meth:`go_on()<.Fleet.go_on>` sends the command of every robot and then waits
+    for all the answers at the same time (with the selectors of the operating system),
+    so the robots stay in lockstep and no CPU is used while waiting.
+
+    .. code-block:: python
+
+        from unifr_api_epuck import wrapper
+
+        fleet = wrapper.get_fleet(['192.168.43.125', '192.168.43.126'])
+        for r in fleet:
+            r.init_sensors()
+
+        while fleet.go_on():
+            for r in fleet:
+                r.set_speed(2)
+            print(fleet.get_latencies())
+
+    :var robots: list of the WifiEpuck instances of the fleet
+    """
+
+    def __init__(self, ip_addrs):
+        """
+        Connects to all the robots
+
+        :param ip_addrs: list of the IP addresses of the e-pucks
+        """
+        # time in seconds before considering a robot is lost
+        self.TIMEOUT = 10
+
+        self.robots = [WifiEpuck(ip_addr) for ip_addr in ip_addrs]
+
+        # one receive state per robot: [robot, header, buffer being received, number of bytes received]
+        self.__selector = selectors.DefaultSelector()
+        self.__states = []
+        for robot in self.robots:
+            header = bytearray(1)
+            state = [robot, header, memoryview(header), 0]
+            self.__states.append(state)
+            self.__selector.register(robot._socket(), selectors.EVENT_READ, state)
+
+        # duration of the last go_on() for each robot, in seconds
+        self.__latencies = {}
+
+        # rate of go_on() in Hz while sleep() waits, if no loop rate is set
+        self.SLEEP_RATE = 20
+        # fixed rate of go_on() (see set_loop_rate)
+        self.__loop_governor = None
+
+        # replaces the handlers of the robots, which only clean up one robot
+        signal.signal(signal.SIGINT, self.__stopcontroller_handler)
+
+    def __len__(self):
+        return len(self.robots)
+
+    def __iter__(self):
+        return iter(self.robots)
+
+    def __getitem__(self, index):
+        return self.robots[index]
+
+    def go_on(self):
+        """
+        Sends and receives the packets of all the robots.
+
+        .. warning::
+            The robots of a fleet must not be in pipelined mode and must not have their own loop rate, 
+            and their own go_on() must not be called.
+
+        :returns: True if all the robots sent camera or sensors data
+        """
+        if self.__loop_governor:
+            self.__loop_governor.wait()
+
+        start = time.monotonic()
+
+        for state in self.__states:
+            robot = state[0]
+            # keeps the host aware that the epuck is alive
+            Epuck.go_on(robot)
+
+            robot._socket().sendall(robot._command_packet())
+            robot._command_sent()
+
+            state[2] = memoryview(state[1])
+            state[3] = 0
+
+        check_return = True
+        waiting = len(self.__states)
+        while waiting:
+            events = self.__selector.select(self.TIMEOUT)
+            if not events:
+                self.__lost_connection([state[0] for state in self.__states if state[2] is not None])
+
+            for key, _ in events:
+                state = key.data
+                robot, header, buffer_view, received = state
+                if buffer_view is None:
+                    continue
+
+                try:
+                    n = robot._socket().recv_into(buffer_view[received:])
+                except OSError:
+                    n = 0
+                if n == 0:
+                    self.__lost_connection([robot])
+
+                state[3] = received = received + n
+                if received < len(buffer_view):
+                    continue
+
+                # header received, then the packet following it
+                if buffer_view.obj is header:
+                    packet_view = robot._packet_buffer(header[0])
+                    if packet_view is not None:
+                        state[2] = packet_view
+                        state[3] = 0
+                        continue
+
+                check_return = robot._packet_received(header[0]) and check_return
+                self.__latencies[robot.get_id()] = time.monotonic() - start
+                state[2] = None
+                waiting -= 1
+
+        return check_return
+
+    def __lost_connection(self, robots):
+        for robot in robots:
+            print('\033[91m'+'Lost connection of : ' +
+                  str(robot.get_ip())+'\033[0m')
+        sys.exit(1)
+
+    def get_latencies(self):
+        """
+        Gets how long each robot took to answer during the last go_on()
+
+        :returns: dict - {robot id: latency in seconds}
+        """
+        return dict(self.__latencies)
+
+    def sleep(self, duration):
+        """
+        Pause the execution during *duration* seconds, while still exchanging packets with the robots.
+
+        :param duration: duration in seconds
+        """
+        loop_governor = self.__loop_governor
+        if not loop_governor:
+            self.__loop_governor = LoopGovernor(self.SLEEP_RATE)
+
+        try:
+            time_finish = time.monotonic()+duration
+            while time.monotonic() < time_finish:
+                self.go_on()
+        finally:
+            self.__loop_governor = loop_governor
+
+    def set_loop_rate(self, rate):
+        """
+        Runs go_on() at a fixed rate: each call waits for the next period before exchanging with the robots.
+
+        :param rate: rate in Hz (None to run as fast as possible)
+        """
+        self.__loop_governor = LoopGovernor(rate) if rate else None
+
+    def get_loop_stats(self):
+        """
+        Statistics of the rate of go_on() on the last 1000 calls
+
+        :returns: dict - target rate and achieved rate (Hz), median and 99th percentile of the jitter (seconds), number of calls. None if no loop rate is set
+        """
+        if self.__loop_governor:
+            return self.__loop_governor.get_stats()
+        return None
+
+    def initiate_model(self, weights=None, fuse=True, warmup=1, backend='eager'):
+        """
+        Initiates the detection network of all the robots (loaded once and shared, see WifiEpuck.initiate_model)
+
+        :param weights: a .pt file containing new possible weights (default: the one trained for the blocks)
+        :param fuse: True to fuse the convolution and batch normalisation layers
+        :param warmup: number of passes run on an empty batch of the size of the fleet after loading (0 for none)
+        :param backend: 'eager' (PyTorch), 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8'
+        """
+        for robot in self.robots:
+            robot.initiate_model(weights, fuse, 0, backend=backend)
+        if warmup:
+            model_registry.get(weights, 'cpu', fuse, 0, backend).warm_up(warmup, len(self.robots))
+
+    def get_detections(self, conf_thresh=0.9, raw=False):
+        """
+        Detects the objects on the last image of every robot, with a single pass of the network on the batch of images
+
+        .. code-block:: python
+
+            fleet.initiate_model()
+            while fleet.go_on():
+                for robot, detection in zip(fleet, fleet.get_detections()):
+                    ...
+
+        :param conf_thresh: minimum confidence of the detections
+        :param raw: True for (n,6) arrays [x_center, y_center, width, height, confidence, class] instead of Detected objects
+        :returns: list of arrays of Detected objects, one for each robot (in the order of the fleet)
+        """
+        return self.robots[0].get_detections([robot.get_frame() for robot in self.robots], conf_thresh, raw)
+
+    def __stopcontroller_handler(self, signum, frame):
+        """
+        Gracefully stops the controller of the robots
+        """
+        signal.signal(signum, signal.SIG_IGN) # ignore additional signals
+        print('cleaning up  ...     ')
+        self.clean_up()
+
+    def clean_up(self):
+        """
+        Stops all the robots and closes their sockets.
+        """
+        for robot in self.robots:
+            robot.disable_camera()
+            robot.disable_all_led()
+            robot.disable_sensors()
+            robot.disable_front_led()
+            robot.disable_body_led()
+            robot.set_speed(0, 0)
+
+        for _ in range(10):
+            self.go_on()
+
+        self.__selector.close()
+        for robot in self.robots:
+            robot._socket().close()
+        sys.exit(0)
@@ -0,0 +1,139 @@
+import time
+import numpy as np
+
+
+class FrameRing:
+    """
+    The last frames of the camera, kept in one preallocated array.
+
+    Each frame has a sequence number (0 for the first frame ever added, then 1, 2...) and the time it was captured (time.time()).
+    The frames returned are views on the ring (no copy), they are overwritten once capacity newer frames have been added.
+
+    .. code-block:: python
+
+        robot.init_frame_ring(30)
+        ring = robot.get_frame_ring()
+        last_sequence = -1
+        while robot.go_on():
+            latest = ring.get_newer_than(last_sequence)
+            if latest:
+                frame, timestamp, last_sequence = latest
+                difference = cv2.absdiff(frame, ring.get(-2)[0])
+
+    :var capacity: maximum number of frames kept
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: maximum number of frames kept (at least 1)
+        """
+        if capacity < 1:
+            raise ValueError('Invalid frame ring capacity: ' + str(capacity) + ' (at least 1)')
+        self.capacity = capacity
+
+        # allocated with the size of the first frame
+        self.frames = None
+        self.timestamps = np.zeros(capacity)
+        self.sequences = np.full(capacity, -1, dtype=np.int64)
+        self.__next_sequence = 0
+
+    def __len__(self):
+        return min(self.__next_sequence, self.capacity)
+
+    def slot(self, shape=None):
+        """
+        :param shape: shape of the frame, needed before the first frame is added
+        :returns: the array where the next frame must be written before calling commit()
+        """
+        if self.frames is None:
+            self.frames = np.zeros((self.capacity,) + tuple(shape), dtype=np.uint8)
+
+        return self.frames[self.__next_sequence % self.capacity]
+
+    def commit(self, timestamp=None):
+        """
+        Adds the frame written in slot()
+
+        :param timestamp: time of capture (now if None)
+        :returns: sequence number of the frame
+        """
+        sequence = self.__next_sequence
+        position = sequence % self.capacity
+        self.timestamps[position] = time.time() if timestamp is None else timestamp
+        self.sequences[position] = sequence
+        self.__next_sequence += 1
+        return sequence
+
+    def push(self, frame, timestamp=None):
+        """
+        Copies a frame in the ring
+
+        :param frame: HxWx3 uint8 array
+        :param timestamp: time of capture (now if None)
+        :returns: sequence number of the frame
+        """
+        np.copyto(self.slot(frame.shape), frame)
+        return self.commit(timestamp)
+
+    def __entry(self, sequence):
+        position = sequence % self.capacity
+        return self.frames[position], float(self.timestamps[position]), sequence
+
+    def get(self, index=-1):
+        """
+        :param index: 0 for the oldest frame kept, -1 for the latest one
+        :returns: (frame, timestamp, sequence) or None if there is no such frame
+        """
+        count = len(self)
+        if not -count <= index < count:
+            return None
+
+        first = self.__next_sequence - count
+        return self.__entry(first + index % count)
+
+    def get_sequence(self, sequence):
+        """
+        :returns: (frame, timestamp, sequence) of the frame with this sequence number, None if not kept anymore
+        """
+        if not self.__next_sequence - len(self) <= sequence < self.__next_sequence:
+            return None
+        return self.__entry(sequence)
+
+    def get_at(self, timestamp):
+        """
+        :param timestamp: a time (time.time())
+        :returns: (frame, timestamp, sequence) of the latest frame captured at or before timestamp, None if all are newer
+        """
+        # binary search on the frames kept, in order of capture
+        low, high = self.__next_sequence - len(self), self.__next_sequence
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[middle % self.capacity] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self.__next_sequence - len(self):
+            return None
+        return self.__entry(low - 1)
+
+    def get_newer_than(self, sequence):
+        """
+        :param sequence: sequence number of the last frame already processed (-1 for none)
+        :returns: (frame, timestamp, sequence) of the latest frame if it is newer, otherwise None
+        """
+        if self.__next_sequence - 1 > sequence:
+            return self.__entry(self.__next_sequence - 1)
+        return None
+
+    def get_last(self, count):
+        """
+        :param count: number of frames
+        :returns: (frames, timestamps, sequences) of the last count frames (at most the number kept), oldest first.
+                  frames is a count x H x W x 3 array (a copy)
+        """
+        count = min(count, len(self))
+        positions = np.arange(self.__next_sequence - count, self.__next_sequence) % self.capacity
+        if self.frames is None:
+            return np.zeros((0,), dtype=np.uint8), self.timestamps[positions], self.sequences[positions]
+        return self.frames[positions], self.timestamps[positions], self.sequences[positions]
@@ -0,0 +1,209 @@
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+#################
+#  FRAME STORE  #
+#################
+# A dataset of camera frames in a folder:
+#   frames.npy: N x H x W x 3 uint8 array (BGR frames)
+#   index.npy: N records of FRAME_STORE_INDEX_DTYPE (metadata of each frame)
+#
+# Both are standard .npy files (np.load(..., mmap_mode='r') works), with a header of fixed size
+# so frames can be appended to the end of the file and the shape updated in place.
+
+NPY_HEADER_SIZE = 256
+
+FRAME_STORE_INDEX_DTYPE = np.dtype([
+    ('timestamp', '<f8'),       # time.time() of the capture
+    ('robot_id', 'S32'),
+    ('speed', '<f4', (2,)),     # left and right speeds
+    ('has_sensors', '?'),       # False if the sensors were not stored
+    ('prox', '<i4', (8,)),
+    ('ground', '<i4', (3,)),
+    ('tof', '<i4'),
+])
+
+
+def _npy_header(dtype, shape):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(dtype), tuple(shape))
+    header = header.ljust(NPY_HEADER_SIZE - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class _NpyAppender:
+    """
+    A .npy file growing along its first axis
+    """
+
+    def __init__(self, filename, dtype, item_shape, mode):
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.item_shape = tuple(item_shape)
+        self.item_size = self.dtype.itemsize * int(np.prod(self.item_shape, dtype=np.int64))
+        self.file = None
+
+        if mode == 'r':
+            self.count = self.__count_items()
+            return
+
+        self.file = open(filename, 'r+b' if os.path.exists(filename) else 'w+b')
+        self.count = self.__count_items()
+        # drop an item not completely written
+        self.file.truncate(NPY_HEADER_SIZE + self.count * self.item_size)
+        self.file.seek(0, os.SEEK_END)
+        self.write_header()
+
+    def __count_items(self):
+        if not os.path.exists(self.filename):
+            return 0
+        return max(0, os.path.getsize(self.filename) - NPY_HEADER_SIZE) // self.item_size
+
+    def write_header(self):
+        position = self.file.tell()
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, (self.count,) + self.item_shape))
+        self.file.seek(max(position, NPY_HEADER_SIZE))
+
+    def append(self, data):
+        self.file.write(data)
+        self.count += 1
+
+    def view(self, count):
+        if count == 0:
+            return np.zeros((0,) + self.item_shape, dtype=self.dtype)
+        return np.memmap(self.filename, dtype=self.dtype, mode='r', offset=NPY_HEADER_SIZE,
+                         shape=(count,) + self.item_shape)
+
+    def close(self):
+        if self.file:
+            self.write_header()
+            self.file.close()
+            self.file = None
+
+
+class FrameStore:
+    """
+    Dataset of camera frames with their metadata, in two memory-mappable files of a folder.
+
+    Frames are appended to the end of one file (much faster than one image file per frame)
+    and the whole dataset is loaded as NumPy arrays without reading it.
+    Another process reading the store sees the frames appended until the last flush() or close().
+
+    .. code-block:: python
+
+        # capture
+        robot.init_frame_store('dataset', include_sensors=True)
+        while robot.go_on():
+            robot.store_frame()
+        robot.close_frame_store()
+
+        # training
+        store = FrameStore('dataset')
+        frames, index = store.frames, store.index     # N x 120 x 160 x 3 and N records
+        print(index['timestamp'], index['robot_id'], index['prox'])
+
+    :var frames: N x H x W x 3 uint8 array of the frames (BGR), memory mapped
+    :var index: N records of FRAME_STORE_INDEX_DTYPE, memory mapped
+    """
+
+    def __init__(self, path, mode='r', frame_shape=None):
+        """
+        :param path: folder of the store
+        :param mode: 'r' to read, 'a' to append frames (the folder is created if needed)
+        :param frame_shape: (height, width, 3) of the frames, needed to create a new store (found in the files otherwise, ValueError if another shape is given)
+        """
+        self.path = path
+        self.mode = mode
+        self.__lock = threading.Lock()
+
+        # an existing store keeps its shape: opening its files with another shape would truncate them
+        stored_shape = self.__read_frame_shape()
+        if frame_shape is None:
+            frame_shape = stored_shape
+        elif stored_shape is not None and tuple(frame_shape) != tuple(stored_shape):
+            raise ValueError('Frames of shape ' + str(tuple(frame_shape)) + ' in a store of ' + str(tuple(stored_shape)) + ': ' + str(path))
+
+        if mode == 'a':
+            os.makedirs(path, exist_ok=True)
+        elif frame_shape is None:
+            raise FileNotFoundError('No frame store in ' + str(path))
+
+        self.__frames = _NpyAppender(os.path.join(path, 'frames.npy'), np.uint8, frame_shape, mode)
+        self.__index = _NpyAppender(os.path.join(path, 'index.npy'), FRAME_STORE_INDEX_DTYPE, (), mode)
+
+        if mode == 'a' and self.__frames.count != self.__index.count:
+            # interrupted during an append: keep the frames having metadata
+            count = min(self.__frames.count, self.__index.count)
+            for appender in (self.__frames, self.__index):
+                appender.count = count
+                appender.file.truncate(NPY_HEADER_SIZE + count * appender.item_size)
+                appender.file.seek(0, os.SEEK_END)
+
+    def __read_frame_shape(self):
+        filename = os.path.join(self.path, 'frames.npy')
+        if not os.path.exists(filename):
+            return None
+        with open(filename, 'rb') as file:
+            np.lib.format.read_magic(file)
+            shape, _, _ = np.lib.format.read_array_header_1_0(file)
+        return shape[1:]
+
+    def __len__(self):
+        return min(self.__frames.count, self.__index.count)
+
+    @property
+    def frames(self):
+        return self.__frames.view(len(self))
+
+    @property
+    def index(self):
+        return self.__index.view(len(self))
+
+    def append(self, frame, robot_id='', speed=(0, 0), prox=None, ground=None, tof=None, timestamp=None):
+        """
+        Appends a frame and its metadata
+
+        :param frame: HxWx3 uint8 array of the shape of the store
+        :param robot_id: str - id of the robot
+        :param speed: [left, right] speeds of the robot
+        :param prox: optional 8 proximity values (the sensors are stored if prox is given)
+        :param ground: optional 3 ground values
+        :param tof: optional time of flight distance
+        :param timestamp: time of the capture (now if None)
+        :returns: index of the frame in the store
+        """
+        if frame.shape != self.__frames.item_shape:
+            raise ValueError('Frame of shape ' + str(frame.shape) + ' in a store of ' + str(self.__frames.item_shape))
+
+        record = np.zeros((), dtype=FRAME_STORE_INDEX_DTYPE)
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['robot_id'] = robot_id.encode()[:32]
+        record['speed'] = speed
+        if prox is not None:
+            record['has_sensors'] = True
+            record['prox'] = prox
+            record['ground'] = ground if ground is not None else 0
+            record['tof'] = tof or 0
+
+        with self.__lock:
+            self.__frames.append(np.ascontiguousarray(frame, dtype=np.uint8).data)
+            self.__index.append(record.tobytes())
+            return len(self) - 1
+
+    def flush(self):
+        """
+        Writes the buffered frames and updates the shape in the headers, so np.load() sees all the frames
+        """
+        with self.__lock:
+            for appender in (self.__frames, self.__index):
+                if appender.file:
+                    appender.write_header()
+                    appender.file.flush()
+
+    def close(self):
+        with self.__lock:
+            self.__frames.close()
+            self.__index.close()
@@ -0,0 +1,130 @@
+import functools
+import io
+import os
+import struct
+import numpy as np
+
+IMAGE_FORMATS = ('jpeg', 'webp', 'png', 'bmp')
+
+BMP_FILE_HEADER_STRUCT = struct.Struct('<2sIHHI')
+BMP_INFO_HEADER_STRUCT = struct.Struct('<IiiHH24x')
+
+# folders whose write errors were already printed, see warn_write_error()
+_failed_folders = set()
+
+
+@functools.lru_cache(maxsize=None)
+def _import_cv2():
+    # OpenCV is imported the first time an image is encoded, not with the API
+    try:
+        import cv2
+        return cv2
+    except ImportError:
+        return None
+
+
+def encode_bmp(frame):
+    """
+    Encodes an image in the 24 bits BMP format, without OpenCV nor Pillow
+
+    :param frame: HxWx3 uint8 array, channels in BGR order (see get_frame())
+    :returns: bytes - the BMP file
+    """
+    height, width = frame.shape[:2]
+    # rows are stored bottom-up, each one padded to a multiple of 4 bytes
+    rows = frame[::-1].reshape(height, width * 3)
+    padding = (4 - (width * 3) % 4) % 4
+    if padding:
+        rows = np.pad(rows, ((0, 0), (0, padding)))
+
+    header_size = BMP_FILE_HEADER_STRUCT.size + BMP_INFO_HEADER_STRUCT.size
+    return (BMP_FILE_HEADER_STRUCT.pack(b'BM', header_size + rows.size, 0, 0, header_size)
+            + BMP_INFO_HEADER_STRUCT.pack(BMP_INFO_HEADER_STRUCT.size, width, height, 1, 24)
+            + rows.tobytes())
+
+
+def read_bmp(filename):
+    """
+    Reads a 24 bits BMP file (e.g. written by encode_bmp() or save_image()), without OpenCV nor Pillow
+
+    :param filename: path of the file
+    :returns: HxWx3 uint8 array, channels in BGR order (as get_frame())
+    """
+    with open(filename, 'rb') as file:
+        data = file.read()
+    _, _, _, _, offset = BMP_FILE_HEADER_STRUCT.unpack_from(data)
+    _, width, height, _, bits = BMP_INFO_HEADER_STRUCT.unpack_from(data, BMP_FILE_HEADER_STRUCT.size)
+    if bits != 24:
+        raise ValueError(filename + ' is not a 24 bits BMP file')
+
+    stride = (width * 3 + 3) // 4 * 4
+    rows = np.frombuffer(data, dtype=np.uint8, count=abs(height) * stride, offset=offset).reshape(abs(height), stride)
+    frame = rows[:, :width * 3].reshape(abs(height), width, 3)
+    # a positive height means the rows are stored bottom-up
+    return frame[::-1].copy() if height > 0 else frame.copy()
+
+
+def encode_image(frame, image_format='jpeg', quality=80):
+    """
+    Encodes an image in memory (no file written), with OpenCV if installed, Pillow otherwise
+
+    :param frame: HxWx3 uint8 array, channels in BGR order (see get_frame())
+    :param image_format: 'jpeg', 'webp', 'png' or 'bmp'
+    :param quality: between 1 and 100, for jpeg and webp
+    :returns: bytes - the encoded image
+    """
+    image_format = image_format.lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError('Unknown image format: ' + image_format)
+
+    if image_format == 'bmp':
+        return encode_bmp(frame)
+
+    cv2 = _import_cv2()
+    if cv2 is not None:
+        if image_format == 'jpeg':
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        elif image_format == 'webp':
+            params = [int(cv2.IMWRITE_WEBP_QUALITY), quality]
+        else:
+            params = []
+
+        ok, data = cv2.imencode('.' + image_format.replace('jpeg', 'jpg'), frame, params)
+        if ok:
+            return data.tobytes()
+
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(frame[:, :, ::-1])).save(buffer, format=image_format.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def write_image(filename, frame, quality=95):
+    """
+    Encodes an image in the format of its file extension (.bmp, .jpg, .png or .webp) and writes it
+
+    :param filename: path of the image
+    :param frame: HxWx3 uint8 array, channels in BGR order (see get_frame())
+    :param quality: between 1 and 100, for jpeg and webp
+    """
+    image_format = os.path.splitext(filename)[1][1:] or 'bmp'
+    data = encode_image(frame, image_format, quality)
+    with open(filename, 'wb') as file:
+        file.write(data)
+
+
+def warn_write_error(filename, error):
+    """
+    Prints why a picture could not be written, once per folder: a controller writing a picture at each step
+    (e.g. ./img/feed.bmp of get_colordetection) in a missing folder does not flood the output
+
+    :param filename: path of the picture
+    :param error: exception raised by write_image()
+    """
+    folder = os.path.dirname(os.path.abspath(filename))
+    if folder not in _failed_folders:
+        _failed_folders.add(folder)
+        print('Cannot write ' + str(filename) + ': ' + str(error) + ' (not repeated for the other pictures of ' + folder + ')')
@@ -0,0 +1,109 @@
+from .image_encoding import write_image, warn_write_error
+import atexit
+import collections
+import threading
+
+
+class ImageWriter:
+    """
+    Encodes and writes images in background threads, so saving pictures does not slow down the controller.
+
+    The images waiting to be written are kept in a bounded queue: when it is full, the oldest image is dropped
+    (the controller is never blocked). The images still waiting are written when the program ends.
+
+    .. code-block:: python
+
+        robot.init_image_writer(workers=2, max_queue=64)
+        for _ in range(1000):
+            robot.go_on()
+            robot.take_picture()
+        robot.flush_images()
+
+    :var written: number of images written
+    :var dropped: number of images dropped because the queue was full
+    """
+
+    def __init__(self, workers=2, max_queue=64):
+        """
+        :param workers: number of threads writing the images
+        :param max_queue: maximum number of images waiting to be written
+        """
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+
+        self.__queue = collections.deque()
+        self.__lock = threading.Lock()
+        self.__not_empty = threading.Condition(self.__lock)
+        self.__all_done = threading.Condition(self.__lock)
+        # images queued or being written
+        self.__pending = 0
+        self.__running = True
+
+        self.__threads = [threading.Thread(target=self.__worker, daemon=True) for _ in range(workers)]
+        for thread in self.__threads:
+            thread.start()
+
+        atexit.register(self.close)
+
+    def write(self, filename, frame, quality=95):
+        """
+        Queues an image to be written, in the format of its file extension (.bmp, .jpg, .png or .webp)
+
+        :param filename: path of the image
+        :param frame: HxWx3 uint8 array, BGR (must not be modified afterwards, give a copy)
+        :param quality: between 1 and 100, for jpeg and webp
+        """
+        with self.__lock:
+            if len(self.__queue) >= self.max_queue:
+                self.__queue.popleft()
+                self.__pending -= 1
+                self.dropped += 1
+
+            self.__queue.append((filename, frame, quality))
+            self.__pending += 1
+            self.__not_empty.notify()
+
+    def flush(self, timeout=None):
+        """
+        Waits until all the queued images are written
+
+        :param timeout: maximum time to wait in seconds (None: no limit)
+        :returns: True if all the images are written
+        """
+        with self.__lock:
+            return self.__all_done.wait_for(lambda: self.__pending == 0, timeout)
+
+    def close(self):
+        """
+        Writes the queued images and stops the threads
+        """
+        if not self.__running:
+            return
+
+        self.flush()
+        with self.__lock:
+            self.__running = False
+            self.__not_empty.notify_all()
+        for thread in self.__threads:
+            thread.join()
+        atexit.unregister(self.close)
+
+    def __worker(self):
+        while True:
+            with self.__lock:
+                self.__not_empty.wait_for(lambda: self.__queue or not self.__running)
+                if not self.__queue:
+                    return
+                filename, frame, quality = self.__queue.popleft()
+
+            try:
+                write_image(filename, frame, quality)
+            except Exception as e:
+                warn_write_error(filename, e)
+
+            with self.__lock:
+                self.__pending -= 1
+                self.written += 1
+                if self.__pending == 0:
+                    self.__all_done.notify_all()
@@ -0,0 +1,153 @@
+import os
+import sys
+
+#######################
+#  INFERENCE BACKENDS #
+#######################
+# Each backend runs the network on a N x 3 x 128 x 160 float32 array (values between 0 and 1)
+# and returns the raw predictions, N x anchors x (5 + classes), before the non maximum suppression.
+#
+#   eager:       the PyTorch network of the .pt file (models/yolo.py)
+#   torchscript: the .torchscript file exported by python3 -m unifr_api_epuck.export_model
+#   onnxruntime: the .onnx file exported by export_model, run by ONNX Runtime (no torch needed)
+#   opencv:      the .onnx file exported by export_model, run by cv2.dnn (no torch needed)
+#   onnxruntime-int8: the .int8.onnx file quantized by export_model (8 bits weights and activations), run by ONNX Runtime
+
+BACKENDS = ('eager', 'torchscript', 'onnxruntime', 'opencv', 'onnxruntime-int8')
+BACKEND_ALIASES = {'pytorch': 'eager', 'torch': 'eager', 'jit': 'torchscript', 'onnx': 'onnxruntime', 'cv2': 'opencv',
+                   'int8': 'onnxruntime-int8', 'quantized': 'onnxruntime-int8'}
+
+# file of each backend, next to the .pt weights
+ARTIFACT_SUFFIXES = {'eager': '.pt', 'torchscript': '.torchscript', 'onnxruntime': '.onnx', 'opencv': '.onnx',
+                     'onnxruntime-int8': '.int8.onnx'}
+
+# --include option of export_model writing the file of each backend
+EXPORT_INCLUDES = {'torchscript': 'torchscript', 'onnxruntime': 'onnx', 'opencv': 'onnx', 'onnxruntime-int8': 'onnx-int8'}
+
+# folder of the models package, which the pickled weights refer to as 'models'
+__location__ = os.path.realpath(os.path.dirname(__file__))
+
+
+def backend_name(backend):
+    """
+    :param backend: name of a backend or one of its aliases ('onnx', 'cv2'...)
+    :returns: the name of the backend in BACKENDS
+    """
+    backend = BACKEND_ALIASES.get(backend.lower(), backend.lower())
+    if backend not in BACKENDS:
+        raise ValueError('Unknown inference backend: ' + backend + ' (' + ', '.join(BACKENDS) + ')')
+    return backend
+
+
+def artifact_path(weights, backend):
+    """
+    :param weights: the .pt file, or directly the file of the backend
+    :returns: the file of the backend (e.g. best.onnx for best.pt and onnxruntime)
+    """
+    suffix = ARTIFACT_SUFFIXES[backend]
+    if weights.endswith(suffix):
+        return weights
+    return os.path.splitext(weights)[0] + suffix
+
+
+class EagerBackend:
+    """
+    The PyTorch network of the .pt file
+    """
+    uses_torch = True
+
+    def __init__(self, weights, device='cpu', fuse=True):
+        from .models.yolo import attempt_load
+
+        # the pickled networks refer to their modules as models.yolo and models.common
+        if __location__ not in sys.path:
+            sys.path.insert(0, __location__)
+
+        self.device = device
+        self.model = attempt_load(weights, map_location=device, fuse=fuse)
+        self.memory = sum(tensor.numel() * tensor.element_size()
+                          for tensor in list(self.model.parameters()) + list(self.model.buffers()))
+
+    def __call__(self, images):
+        import torch
+
+        with torch.no_grad():
+            return self.model(torch.from_numpy(images).to(self.device), augment=False, visualize=False)[0]
+
+
+class TorchScriptBackend(EagerBackend):
+    """
+    The network exported with torch.jit.trace (no Python code of the network, faster to load)
+    """
+
+    def __init__(self, weights, device='cpu', fuse=True):
+        import torch
+
+        self.device = device
+        self.model = torch.jit.load(weights, map_location=device).eval()
+        self.memory = sum(tensor.numel() * tensor.element_size()
+                          for tensor in list(self.model.parameters()) + list(self.model.buffers()))
+
+    def __call__(self, images):
+        import torch
+
+        with torch.no_grad():
+            return self.model(torch.from_numpy(images).to(self.device))
+
+
+class OnnxRuntimeBackend:
+    """
+    The ONNX network run by ONNX Runtime, on the CPU (also the quantized network of the onnxruntime-int8 backend)
+    """
+    uses_torch = False
+
+    def __init__(self, weights, device='cpu', fuse=True):
+        import onnxruntime
+
+        self.device = 'cpu'
+        self.model = onnxruntime.InferenceSession(weights, providers=['CPUExecutionProvider'])
+        self.__input = self.model.get_inputs()[0].name
+        self.memory = os.path.getsize(weights)
+
+    def __call__(self, images):
+        return self.model.run(None, {self.__input: images})[0]
+
+
+class OpenCVBackend:
+    """
+    The ONNX network run by the DNN module of OpenCV, on the CPU
+    """
+    uses_torch = False
+
+    def __init__(self, weights, device='cpu', fuse=True):
+        import cv2
+
+        self.device = 'cpu'
+        self.model = cv2.dnn.readNetFromONNX(weights)
+        self.memory = os.path.getsize(weights)
+
+    def __call__(self, images):
+        self.model.setInput(images)
+        return self.model.forward()
+
+
+BACKEND_CLASSES = {'eager': EagerBackend, 'torchscript': TorchScriptBackend,
+                   'onnxruntime': OnnxRuntimeBackend, 'opencv': OpenCVBackend, 'onnxruntime-int8': OnnxRuntimeBackend}
+
+
+def load_backend(weights, backend='eager', device='cpu', fuse=True):
+    """
+    :param weights: the .pt file (the file of the backend is found next to it), or the file of the backend
+    :param backend: 'eager', 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8'
+    :param device: 'cpu' or 'cuda' (eager and torchscript only)
+    :param fuse: True to fuse the convolution and batch normalisation layers (eager only, the exported files are fused)
+    :returns: the backend, called with a N x 3 x 128 x 160 float32 array
+    """
+    backend = backend_name(backend)
+    path = artifact_path(weights, backend)
+    if not os.path.exists(path):
+        if backend not in EXPORT_INCLUDES:
+            raise FileNotFoundError('No ' + path)
+        raise FileNotFoundError('No ' + path + ' for the ' + backend + ' backend, export it with: python3 -m unifr_api_epuck.export_model --weights '
+                                + weights + ' --include ' + EXPORT_INCLUDES[backend])
+    return BACKEND_CLASSES[backend](path, device, fuse)
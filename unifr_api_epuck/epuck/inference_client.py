@@ -0,0 +1,153 @@
+from .detector import to_detected
+from multiprocessing import shared_memory
+from multiprocessing.managers import BaseManager
+import queue
+import threading
+import uuid
+import numpy as np
+
+# address of the inference server (python3 -m unifr_api_epuck.inference_server)
+INFERENCE_SERVER_PORT = 50010
+INFERENCE_SERVER_AUTHKEY = b'epuck_inference'
+
+# shape of the frames and maximum number of frames sent in one request
+FRAME_SHAPE = (120, 160, 3)
+MAX_BATCH = 16
+
+
+class InferenceManager(BaseManager):
+    """
+    Manager of the inference server, shares the queue of the requests and one queue of responses per client.
+    The frames themselves are in the shared memory of the clients, only their name goes through the queues.
+    """
+    pass
+
+
+InferenceManager.register('requests')
+InferenceManager.register('responses')
+
+
+def parse_address(address):
+    """
+    :param address: 'host:port', 'host', (host, port) or None (local server, default port)
+    :returns: (host, port)
+    """
+    if address is None:
+        return ('127.0.0.1', INFERENCE_SERVER_PORT)
+    if isinstance(address, str):
+        host, _, port = address.partition(':')
+        return (host or '127.0.0.1', int(port) if port else INFERENCE_SERVER_PORT)
+    return tuple(address)
+
+
+class InferenceClient:
+    """
+    Detection done by an inference server on the same computer: the server loads the network once
+    and analyses the frames of all the controllers, which do not need to import torch.
+
+    The frames are written in a shared memory slot of the client (no copy through a socket), the server
+    answers with the detections on the queue of the client.
+
+    .. code-block:: python
+
+        # terminal 1
+        python3 -m unifr_api_epuck.inference_server
+
+        # controllers
+        robot.initiate_model(server='127.0.0.1')
+        detection = robot.get_detection(robot.get_frame())
+    """
+
+    def __init__(self, address=None, authkey=INFERENCE_SERVER_AUTHKEY, timeout=10):
+        """
+        :param address: address of the server, 'host:port' (default: this computer, port 50010)
+        :param authkey: authentication key of the server
+        :param timeout: seconds to wait for a response before raising TimeoutError
+        """
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.id = uuid.uuid4().hex
+
+        self.__manager = InferenceManager(self.address, authkey=authkey)
+        self.__manager.connect()
+        self.__requests = self.__manager.requests()
+        self.__responses = self.__manager.responses(self.id)
+
+        self.__slot = shared_memory.SharedMemory(create=True, size=MAX_BATCH * int(np.prod(FRAME_SHAPE)))
+        self.__frames = np.ndarray((MAX_BATCH,) + FRAME_SHAPE, dtype=np.uint8, buffer=self.__slot.buf)
+
+        # one request at a time: the slot is reused by the next one
+        self.__lock = threading.Lock()
+        self.__request_id = 0
+        self.__inference_worker = None
+
+    def detect(self, frames, conf_thresh=0.9):
+        """
+        Detects the objects of the frames with the network of the server
+
+        :param frames: list of 120x160x3 BGR arrays
+        :param conf_thresh: minimum confidence of the detections
+        :returns: list of lists of Detected objects, one list per frame
+        """
+        return [to_detected(array) for array in self.detect_arrays(frames, conf_thresh)]
+
+    def detect_arrays(self, frames, conf_thresh=0.9):
+        """
+        Same as detect(), with one (n,6) array [x_center, y_center, width, height, confidence, class] per frame
+        """
+        detections = []
+        for start in range(0, len(frames), MAX_BATCH):
+            detections += self.__detect(frames[start:start + MAX_BATCH], conf_thresh)
+        return detections
+
+    def __detect(self, frames, conf_thresh):
+        with self.__lock:
+            for slot, frame in zip(self.__frames, frames):
+                np.copyto(slot, frame)
+
+            self.__request_id += 1
+            self.__requests.put(('detect', self.id, self.__request_id, self.__slot.name, len(frames), conf_thresh))
+
+            # responses of earlier requests which timed out are skipped
+            while True:
+                try:
+                    request_id, result = self.__responses.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError('No response of the inference server ' + '{}:{}'.format(*self.address))
+                if request_id == self.__request_id:
+                    break
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_inference_worker(self):
+        """
+        :returns: the InferenceWorker sending the frames of get_detection_async() to the server
+        """
+        with self.__lock:
+            if self.__inference_worker is None:
+                from .inference_worker import InferenceWorker
+                self.__inference_worker = InferenceWorker(self)
+            return self.__inference_worker
+
+    def get_stats(self):
+        """
+        :returns: dict - address of the server (the statistics of the network are printed by the server)
+        """
+        return {'server': '{}:{}'.format(*self.address)}
+
+    def close(self):
+        """
+        Tells the server to forget this client and frees the shared memory
+        """
+        if self.__inference_worker:
+            self.__inference_worker.close()
+        with self.__lock:
+            try:
+                self.__requests.put(('close', self.id, 0, self.__slot.name, 0, 0))
+            except (OSError, EOFError):
+                pass
+            self.__frames = None
+            self.__slot.close()
+            self.__slot.unlink()
@@ -0,0 +1,116 @@
+from concurrent.futures import Future
+import threading
+import time
+
+
+class InferenceWorker:
+    """
+    Runs the detection in a background thread, so the control loop keeps running while the network analyses a frame.
+
+    Each robot (key) has at most one frame waiting: a new frame replaces the one not analysed yet (its future is cancelled),
+    so the detection never lags behind the camera. The frames waiting for several robots are analysed in one batch.
+
+    .. code-block:: python
+
+        robot.initiate_model()
+        while robot.go_on():
+            future = robot.get_detection_async()
+            ...                                   # go_on() continues at full rate
+            detection = robot.get_last_detection()  # latest result, None until the first one
+
+    :var processed: number of frames analysed
+    :var dropped: number of frames replaced by a newer one before being analysed
+    :var batches: number of passes of the network
+    """
+
+    def __init__(self, loaded_model):
+        """
+        :param loaded_model: the LoadedModel of the model registry (or the InferenceClient of an inference server)
+        """
+        self.loaded_model = loaded_model
+        self.processed = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+        # {key: (frame, conf_thresh, future, time submitted)} waiting to be analysed
+        self.__pending = {}
+        # {key: (detections, time of the frame)} of the last analysed frames
+        self.__latest = {}
+        self.__running = True
+
+        self.__thread = threading.Thread(target=self.__worker, daemon=True)
+        self.__thread.start()
+
+    def submit(self, frame, conf_thresh=0.9, key=None):
+        """
+        Queues a frame to be analysed
+
+        :param frame: 120x160x3 BGR array, not modified afterwards (give a copy)
+        :param conf_thresh: minimum confidence of the detections
+        :param key: id of the robot, a newer frame with the same key replaces this one if it is not analysed yet
+        :returns: concurrent.futures.Future of the list of Detected objects
+        """
+        future = Future()
+        with self.__lock:
+            if not self.__running:
+                raise RuntimeError('The inference worker is closed')
+
+            previous = self.__pending.get(key)
+            if previous and previous[2].cancel():
+                self.dropped += 1
+            self.__pending[key] = (frame, conf_thresh, future, time.time())
+            self.__condition.notify()
+        return future
+
+    def get_latest(self, key=None):
+        """
+        :param key: id of the robot
+        :returns: (list of Detected objects, time the frame was submitted) of the last frame analysed, None if none yet
+        """
+        with self.__lock:
+            return self.__latest.get(key)
+
+    def close(self):
+        """
+        Analyses the frames waiting and stops the thread
+        """
+        with self.__lock:
+            self.__running = False
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __worker(self):
+        while True:
+            with self.__lock:
+                self.__condition.wait_for(lambda: self.__pending or not self.__running)
+                if not self.__pending:
+                    return
+                batch = [(key,) + request for key, request in self.__pending.items()
+                         if request[2].set_running_or_notify_cancel()]
+                self.__pending.clear()
+
+            if not batch:
+                continue
+
+            try:
+                # the lowest threshold for the batch, then the threshold of each frame
+                detections = self.loaded_model.detect([request[1] for request in batch],
+                                                      min(request[2] for request in batch))
+            except Exception as e:
+                for request in batch:
+                    request[3].set_exception(e)
+                continue
+
+            detections = [[item for item in detection if item.confidence >= request[2]]
+                          for request, detection in zip(batch, detections)]
+            with self.__lock:
+                self.batches += 1
+                self.processed += len(batch)
+                for (key, _, _, _, submitted), detection in zip(batch, detections):
+                    self.__latest[key] = (detection, submitted)
+
+            # outside of the lock, the callbacks of the futures may call get_latest()
+            for request, detection in zip(batch, detections):
+                request[3].set_result(detection)
@@ -0,0 +1,126 @@
+import json
+import math
+import time
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Streaming histogram of durations with logarithmic bins (20 per decade, from 1 microsecond to 100 seconds),
+    so adding a value is constant time and the memory does not grow with the number of values.
+    The percentiles are precise to about 12 %, the count, mean, min and max are exact.
+    """
+
+    BINS_PER_DECADE = 20
+    MIN_VALUE = 1e-6
+    BINS_COUNT = 8 * BINS_PER_DECADE
+
+    def __init__(self):
+        self.counts = np.zeros(self.BINS_COUNT, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value):
+        """
+        :param value: duration in seconds
+        """
+        if value > self.MIN_VALUE:
+            i = min(int(self.BINS_PER_DECADE * math.log10(value / self.MIN_VALUE)), self.BINS_COUNT - 1)
+        else:
+            i = 0
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @classmethod
+    def bin_edge(cls, i):
+        """
+        :returns: lower edge in seconds of the bin i
+        """
+        return cls.MIN_VALUE * 10 ** (i / cls.BINS_PER_DECADE)
+
+    def percentile(self, q):
+        """
+        :param q: percentile between 0 and 100
+        :returns: duration in seconds (middle of the bin containing the percentile, bounded by min and max)
+        """
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), math.ceil(q / 100 * self.count) or 1))
+        value = math.sqrt(self.bin_edge(i) * self.bin_edge(i + 1))
+        return min(max(value, self.min), self.max)
+
+    def get_stats(self):
+        """
+        :returns: dict - count, mean, min, max, p50, p90 and p99 (seconds)
+        """
+        if not self.count:
+            return {'count': 0, 'mean': 0.0, 'min': 0.0, 'max': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0}
+
+        return {'count': self.count, 'mean': self.total / self.count, 'min': self.min, 'max': self.max,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99)}
+
+    def to_dict(self):
+        """
+        :returns: dict - statistics and the non empty bins ({'edges': lower edges in seconds, 'counts': counts})
+        """
+        data = self.get_stats()
+        bins = np.flatnonzero(self.counts)
+        data['histogram'] = {'edges': [self.bin_edge(i) for i in bins], 'counts': self.counts[bins].tolist()}
+        return data
+
+
+class LatencyStats:
+    """
+    Durations of the phases of go_on(), one LatencyHistogram per phase.
+
+    .. code-block:: python
+
+        stats = LatencyStats()
+        start = stats.clock()
+        ...
+        start = stats.record('send', start)
+        ...
+        stats.record('receive', start)
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        # clock of the durations
+        self.clock = time.perf_counter
+
+    def record(self, phase, start):
+        """
+        Adds the duration from start until now to the phase
+
+        :param phase: str - name of the phase
+        :param start: time given by clock() at the start of the phase
+        :returns: the current time, start of the next phase
+        """
+        now = self.clock()
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.add(now - start)
+        return now
+
+    def get_stats(self):
+        """
+        :returns: dict - {phase: {count, mean, min, max, p50, p90, p99}}, durations in seconds
+        """
+        return {phase: histogram.get_stats() for phase, histogram in self.histograms.items()}
+
+    def dump_json(self, filename):
+        """
+        Writes the statistics and the histograms of all the phases in a JSON file
+
+        :param filename: path of the JSON file
+        """
+        with open(filename, 'w') as file:
+            json.dump({phase: histogram.to_dict() for phase, histogram in self.histograms.items()}, file, indent=2)
@@ -0,0 +1,95 @@
+import time
+import numpy as np
+
+
+class LoopGovernor:
+    """
+    Keeps a loop at a fixed rate.
+
+    The deadlines are scheduled on the monotonic clock, one period after the previous deadline
+    (not after the previous wake up), so the time lost by each sleep does not accumulate.
+    When the loop falls more than one period behind, the schedule restarts from now instead of
+    running the late iterations back to back.
+
+    .. code-block:: python
+
+        governor = LoopGovernor(20)
+        while True:
+            governor.wait()
+            ...
+        print(governor.get_stats())
+
+    :var rate: target rate in Hz
+    """
+
+    def __init__(self, rate, window=1000):
+        """
+        :param rate: target rate in Hz
+        :param window: number of the last iterations kept for the statistics
+        """
+        self.rate = rate
+        self.__period = 1 / rate
+        self.__deadline = None
+
+        # circular buffers of the last iterations: time of wake up and delay after the deadline
+        self.__ticks = np.zeros(window)
+        self.__jitters = np.zeros(window)
+        self.__count = 0
+
+    def delay(self):
+        """
+        :returns: time in seconds to wait before the next deadline (0 if already passed)
+        """
+        if self.__deadline is None:
+            return 0.0
+        return max(0.0, self.__deadline - time.monotonic())
+
+    def tick(self):
+        """
+        Marks the start of an iteration and schedules the next deadline.
+        """
+        now = time.monotonic()
+
+        if self.__deadline is None:
+            jitter = 0.0
+            self.__deadline = now
+        else:
+            jitter = max(0.0, now - self.__deadline)
+            if jitter > self.__period:
+                # too late, do not try to catch up
+                self.__deadline = now
+
+        self.__deadline += self.__period
+
+        i = self.__count % len(self.__ticks)
+        self.__ticks[i] = now
+        self.__jitters[i] = jitter
+        self.__count += 1
+
+    def wait(self):
+        """
+        Sleeps until the next deadline, then starts the iteration.
+        """
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        self.tick()
+
+    def get_stats(self):
+        """
+        Statistics on the last iterations (at most window)
+
+        :returns: dict - target rate and achieved rate (Hz), median and 99th percentile of the jitter (seconds), number of iterations
+        """
+        n = min(self.__count, len(self.__ticks))
+        stats = {'rate': self.rate, 'achieved_rate': 0.0, 'jitter_p50': 0.0, 'jitter_p99': 0.0, 'iterations': self.__count}
+        if n < 2:
+            return stats
+
+        ticks = self.__ticks[:n]
+        jitters = self.__jitters[:n]
+        duration = ticks.max() - ticks.min()
+        if duration > 0:
+            stats['achieved_rate'] = float((n - 1) / duration)
+        stats['jitter_p50'], stats['jitter_p99'] = np.percentile(jitters, [50, 99]).tolist()
+        return stats
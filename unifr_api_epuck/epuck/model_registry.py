@@ -0,0 +1,214 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+# folder of the default weights (best.pt)
+__location__ = os.path.realpath(os.path.dirname(__file__))
+DEFAULT_WEIGHTS = os.path.join(__location__, 'best.pt')
+
+# shape of the images given to the network: 120x160 frames padded to 128x160 (a multiple of the stride)
+INPUT_SHAPE = (3, 128, 160)
+
+
+def _process_memory():
+    """
+    :returns: resident memory of the process in bytes, None if unknown
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+        # maximum resident memory, in kilobytes on Linux and bytes on macOS
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+    except ImportError:
+        return None
+
+
+class LoadedModel:
+    """
+    A network loaded once by the ModelRegistry and shared by all the robots of the process
+
+    :var backend: the inference backend running the network (see inference_backends)
+    :var model: the network of the backend (see attempt_load for the eager backend)
+    :var weights: absolute path of the weights
+    :var device: 'cpu' or 'cuda'
+    :var fuse: True if the Conv2d and BatchNorm2d layers are fused
+    :var load_time: seconds to load the weights
+    :var warmup_time: seconds of the warm-up passes
+    :var memory: bytes of the parameters and buffers of the network
+    :var process_memory: increase of the resident memory of the process while loading in bytes (None if unknown)
+    """
+
+    def __init__(self, backend, weights, backend_name, fuse):
+        self.backend = backend
+        self.backend_name = backend_name
+        self.model = backend.model
+        self.weights = weights
+        self.device = backend.device
+        self.fuse = fuse
+        self.load_time = 0.0
+        self.warmup_time = 0.0
+        self.warmup_passes = 0
+        self.memory = 0
+        self.process_memory = None
+
+        # background detection shared by the robots using this network (see get_inference_worker)
+        self.__inference_worker = None
+        self.__lock = threading.Lock()
+
+    def detect(self, frames, conf_thresh=0.9):
+        """
+        Detects the objects of the frames in a single pass of the network (see detector.detect)
+
+        :param frames: list of 120x160x3 BGR arrays
+        :param conf_thresh: minimum confidence of the detections
+        :returns: list of lists of Detected objects, one list per frame
+        """
+        from .detector import detect
+        return detect(self, frames, conf_thresh)
+
+    def detect_arrays(self, frames, conf_thresh=0.9):
+        """
+        Same as detect(), with one (n,6) array [x_center, y_center, width, height, confidence, class] per frame (see detector.detect_arrays)
+        """
+        from .detector import detect_arrays
+        return detect_arrays(self, frames, conf_thresh)
+
+    def get_inference_worker(self):
+        """
+        :returns: the :py:class:`InferenceWorker<unifr_api_epuck.epuck.inference_worker.InferenceWorker>` of this network, started at the first call
+        """
+        with self.__lock:
+            if self.__inference_worker is None:
+                from .inference_worker import InferenceWorker
+                self.__inference_worker = InferenceWorker(self)
+            return self.__inference_worker
+
+    def warm_up(self, passes=1, batch_size=1):
+        """
+        Runs the network on empty images, so the first real detection is not slowed down by the initialisation of torch
+
+        :param passes: number of forward passes
+        :param batch_size: number of images of each pass
+        """
+        start = time.perf_counter()
+        images = np.zeros((batch_size,) + INPUT_SHAPE, dtype=np.float32)
+        for _ in range(passes):
+            self.backend(images)
+        self.warmup_time += time.perf_counter() - start
+        self.warmup_passes += passes
+
+    def get_stats(self):
+        """
+        :returns: dict - weights, backend, device, fuse, load_time, warmup_time, warmup_passes, memory and process_memory (bytes)
+        """
+        return {'weights': self.weights, 'backend': self.backend_name, 'device': self.device, 'fuse': self.fuse,
+                'load_time': self.load_time, 'warmup_time': self.warmup_time, 'warmup_passes': self.warmup_passes,
+                'memory': self.memory, 'process_memory': self.process_memory}
+
+
+class ModelRegistry:
+    """
+    Networks of the process, loaded once for each weights file and options and shared by all the robots.
+
+    .. code-block:: python
+
+        from unifr_api_epuck.epuck.model_registry import model_registry
+
+        # the second robot reuses the network of the first one
+        robot1.initiate_model()
+        robot2.initiate_model()
+        print(model_registry.get_stats())
+    """
+
+    def __init__(self):
+        self.__models = {}
+        self.__clients = {}
+        self.__lock = threading.Lock()
+
+    def get(self, weights=None, device='cpu', fuse=True, warmup=1, backend='eager'):
+        """
+        Loads a network, or returns the one already loaded with the same weights and options
+
+        :param weights: path of a .pt file (default: the weights trained for the blocks)
+        :param device: 'cpu' or 'cuda'
+        :param fuse: True to fuse the Conv2d and BatchNorm2d layers (faster inference)
+        :param warmup: number of forward passes run after loading (0 for none)
+        :param backend: 'eager' (PyTorch), 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8' (quantized), see :py:mod:`inference_backends<unifr_api_epuck.epuck.inference_backends>`
+        :returns: the LoadedModel
+        """
+        from .inference_backends import backend_name
+
+        key = (os.path.realpath(weights or DEFAULT_WEIGHTS), device, fuse, backend_name(backend))
+
+        # the lock is held while loading, so robots initiating the model at the same time load it only once
+        with self.__lock:
+            loaded = self.__models.get(key)
+            if loaded is None:
+                loaded = self.__models[key] = self.__load(*key)
+                if warmup:
+                    loaded.warm_up(warmup)
+
+        return loaded
+
+    def __load(self, weights, device, fuse, backend):
+        from .inference_backends import load_backend
+
+        memory_before = _process_memory()
+        start = time.perf_counter()
+        loaded = LoadedModel(load_backend(weights, backend, device, fuse), weights, backend, fuse)
+        loaded.load_time = time.perf_counter() - start
+
+        loaded.memory = loaded.backend.memory
+        memory_after = _process_memory()
+        if memory_before is not None and memory_after is not None:
+            loaded.process_memory = memory_after - memory_before
+
+        return loaded
+
+    def get_client(self, address=None):
+        """
+        Connects to an inference server (python3 -m unifr_api_epuck.inference_server), once per address
+
+        :param address: 'host:port' of the server (default: this computer, port 50010)
+        :returns: the :py:class:`InferenceClient<unifr_api_epuck.epuck.inference_client.InferenceClient>`, used like a LoadedModel
+        """
+        from .inference_client import InferenceClient, parse_address
+
+        key = parse_address(address)
+        with self.__lock:
+            client = self.__clients.get(key)
+            if client is None:
+                client = self.__clients[key] = InferenceClient(key)
+        return client
+
+    def release(self, weights=None):
+        """
+        Forgets the networks loaded with these weights (all the networks if None), they are freed once no robot uses them
+        """
+        with self.__lock:
+            if weights is None:
+                self.__models.clear()
+                return
+
+            weights = os.path.realpath(weights)
+            for key in [key for key in self.__models if key[0] == weights]:
+                del self.__models[key]
+
+    def get_stats(self):
+        """
+        :returns: list of dict - statistics of each loaded network (see LoadedModel.get_stats)
+        """
+        with self.__lock:
+            return [loaded.get_stats() for loaded in self.__models.values()]
+
+
+# registry shared by all the robots of the process
+model_registry = ModelRegistry()
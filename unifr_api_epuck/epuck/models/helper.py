@@ -6,49 +6,6 @@ import random
 import torch
 import torchvision
 
-def label_to_color(label):
-    
-    if label == "Black Block":
-        return (0,0,0)
-    elif label == "Black Ball":
-        return (100,100,100)
-    elif label == "Red Block":
-        return (0,0,255)
-    elif label == "Blue Block":
-        return (255,0,0)
-    elif label == "Green Block":
-        return (0,255,0)
-    elif label == "Epuck":
-        return (0,255,255)
-    else:
-        return (random.randint(0,255),random.randint(0,255),random.randint(0,255))
-
-
-# draw a single bounding box onto a numpy array image
-def draw_bounding_box(img, detect):
-    
-    floor = lambda x: x if x >= 0 else 0 
-    ceiling_x = lambda x: x if x <= 160 else 160
-    ceiling_y = lambda x: x if x <=120 else 120
-
-    
-    x_min, y_min = floor(int(detect.x_center - detect.width / 2)), floor(int(detect.y_center - detect.height / 2))
-    x_max, y_max = ceiling_x(int(detect.x_center + detect.width / 2)), ceiling_y(int(detect.y_center + detect.height / 2))
-    
-    label = detect.label
-    color = label_to_color(label)
-    conf = str(detect.confidence)
-   
-    cv2.rectangle(img,(x_min,y_min),(x_max,y_max), color, 2)
-    cv2.putText(img,label+": "+conf,(x_min,y_min-10),cv2.FONT_HERSHEY_SIMPLEX,0.5,color,1)
-
-
-# draw all annotation bounding boxes on an image
-def plot_detection(img, detection):
-    for detect in detection:
-        draw_bounding_box(img, detect)
-
-
 def box_iou(box1, box2):
     # https://github.com/pytorch/vision/blob/master/torchvision/ops/boxes.py
     """
@@ -259,4 +216,35 @@ def non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, classes=Non
             print(f'WARNING: NMS time limit {time_limit}s exceeded')
             break  # time limit exceeded
 
-    return output
\ No newline at end of file
+    return output
+
+def batched_non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, max_det=300):
+    """Runs Non-Maximum Suppression on the inference results of all the images with a single torchvision.ops.batched_nms() call
+    (same detections as non_max_suppression() with the best class only)
+
+    Returns:
+         list of detections, on (n,6) tensor per image [xyxy, conf, cls]
+    """
+
+    assert 0 <= conf_thres <= 1, f'Invalid Confidence threshold {conf_thres}, valid values are between 0.0 and 1.0'
+    assert 0 <= iou_thres <= 1, f'Invalid IoU {iou_thres}, valid values are between 0.0 and 1.0'
+
+    bs, nc = prediction.shape[0], prediction.shape[2] - 5  # batch size, number of classes
+
+    # candidates of all the images, with the index of their image
+    xi, ai = (prediction[..., 4] > conf_thres).nonzero(as_tuple=True)
+    x = prediction[xi, ai]
+
+    conf, j = (x[:, 5:] * x[:, 4:5]).max(1)  # conf = obj_conf * cls_conf, best class only
+    keep = conf > conf_thres
+    xi, box, conf, j = xi[keep], xywh2xyxy(x[keep, :4]), conf[keep], j[keep]
+
+    # boxes are only suppressed by boxes of the same image and class
+    i = torchvision.ops.batched_nms(box, conf, xi * nc + j, iou_thres)  # indexes sorted by decreasing confidence
+
+    x = torch.cat((box, conf[:, None], j[:, None].to(box.dtype)), 1)[i]
+    xi = xi[i]
+    output = []
+    for image in range(bs):
+        output.append(x[xi == image][:max_det])
+    return output
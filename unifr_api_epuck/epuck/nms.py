@@ -0,0 +1,109 @@
+import numpy as np
+
+##############################
+#  NUMPY NON MAX SUPPRESSION #
+##############################
+# Same detections as models.helper.batched_non_max_suppression (torchvision.ops.batched_nms), without torch:
+# used for the backends which do not need torch to run the network (onnxruntime, opencv).
+
+
+def xywh2xyxy(x):
+    """
+    :param x: (n,4) array of boxes [x_center, y_center, width, height]
+    :returns: (n,4) array of boxes [x1, y1, x2, y2], xy1=top-left, xy2=bottom-right
+    """
+    y = np.empty_like(x)
+    y[:, 0] = x[:, 0] - x[:, 2] / 2  # top left x
+    y[:, 1] = x[:, 1] - x[:, 3] / 2  # top left y
+    y[:, 2] = x[:, 0] + x[:, 2] / 2  # bottom right x
+    y[:, 3] = x[:, 1] + x[:, 3] / 2  # bottom right y
+    return y
+
+
+def box_iou(box1, box2):
+    """
+    Intersection over union of boxes [x1, y1, x2, y2]
+
+    :param box1: (n,4) array
+    :param box2: (m,4) array
+    :returns: (n,m) array of the intersection over union of each pair of boxes
+    """
+    area1 = (box1[:, 2] - box1[:, 0]) * (box1[:, 3] - box1[:, 1])
+    area2 = (box2[:, 2] - box2[:, 0]) * (box2[:, 3] - box2[:, 1])
+
+    width = np.clip(np.minimum(box1[:, None, 2], box2[:, 2]) - np.maximum(box1[:, None, 0], box2[:, 0]), 0, None)
+    height = np.clip(np.minimum(box1[:, None, 3], box2[:, 3]) - np.maximum(box1[:, None, 1], box2[:, 1]), 0, None)
+    inter = width * height
+    return inter / (area1[:, None] + area2 - inter)
+
+
+def nms(boxes, scores, iou_thres):
+    """
+    Keeps the boxes by decreasing score, without the ones overlapping a kept box by more than iou_thres (torchvision.ops.nms)
+
+    :param boxes: (n,4) array of boxes [x1, y1, x2, y2]
+    :param scores: (n,) array
+    :param iou_thres: maximum intersection over union with a box of higher score
+    :returns: indexes of the boxes kept, sorted by decreasing score
+    """
+    order = np.argsort(-scores, kind='stable')
+    # at most one box per anchor of an image and class: a small matrix
+    overlap = box_iou(boxes[order], boxes[order]) > iou_thres
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1:] &= ~overlap[i, i + 1:]
+    return order[keep]
+
+
+def batched_nms(boxes, scores, idxs, iou_thres):
+    """
+    Same as nms(), a box is only suppressed by the boxes of the same index (torchvision.ops.batched_nms)
+
+    :param boxes: (n,4) array of boxes [x1, y1, x2, y2]
+    :param scores: (n,) array
+    :param idxs: (n,) array of integers, e.g. the class of the boxes
+    :param iou_thres: maximum intersection over union with a box of higher score and of the same index
+    :returns: indexes of the boxes kept, sorted by decreasing score
+    """
+    if not len(idxs):
+        return np.zeros(0, dtype=np.int64)
+
+    # the boxes of each index, then the suppression in each group
+    order = np.argsort(idxs, kind='stable')
+    groups = np.split(order, np.flatnonzero(np.diff(idxs[order])) + 1)
+    keep = np.concatenate([group[nms(boxes[group], scores[group], iou_thres)] for group in groups])
+    return keep[np.argsort(-scores[keep], kind='stable')]
+
+
+def non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, max_det=300):
+    """
+    Non maximum suppression of the raw predictions of all the images, best class only
+
+    :param prediction: N x anchors x (5 + classes) array given by the network
+    :param conf_thres: minimum confidence (objectness x class) of the boxes
+    :param iou_thres: maximum intersection over union of two boxes of the same image and class
+    :param max_det: maximum number of boxes per image
+    :returns: list of (n,6) arrays [x1, y1, x2, y2, conf, cls] per image, sorted by decreasing confidence
+    """
+    assert 0 <= conf_thres <= 1, f'Invalid Confidence threshold {conf_thres}, valid values are between 0.0 and 1.0'
+    assert 0 <= iou_thres <= 1, f'Invalid IoU {iou_thres}, valid values are between 0.0 and 1.0'
+
+    bs, nc = prediction.shape[0], prediction.shape[2] - 5  # batch size, number of classes
+
+    # candidates of all the images, with the index of their image
+    xi, ai = np.nonzero(prediction[..., 4] > conf_thres)
+    x = prediction[xi, ai]
+
+    scores = x[:, 5:] * x[:, 4:5]  # conf = obj_conf * cls_conf, best class only
+    j = scores.argmax(1)
+    conf = scores[np.arange(len(j)), j]
+    keep = conf > conf_thres
+    xi, box, conf, j = xi[keep], xywh2xyxy(x[keep, :4]), conf[keep], j[keep]
+
+    # boxes are only suppressed by boxes of the same image and class
+    i = batched_nms(box, conf, xi * nc + j, iou_thres)
+
+    x = np.concatenate((box, conf[:, None], j[:, None].astype(box.dtype)), 1)[i]
+    xi = xi[i]
+    return [x[xi == image][:max_det] for image in range(bs)]
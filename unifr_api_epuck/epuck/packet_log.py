@@ -0,0 +1,130 @@
+import struct
+import threading
+import numpy as np
+
+#################
+#  PACKET LOG   #
+#################
+# Binary log of the packets received from a real e-puck over Wi-Fi.
+#
+# file header: magic 'EPUCKLOG', version (uint16), id of the robot (32 bytes)
+# then one record per packet:
+#   record header: timestamp (float64, time.time()), packet header (uint8: 1 image, 2 sensors),
+#                  size of the packet (uint32), command packet sent before receiving it (21 bytes)
+#   packet: size bytes
+#
+# All numbers are little endian. The packets are written as received, so the file can be
+# memory mapped and each packet read without copy.
+
+LOG_MAGIC = b'EPUCKLOG'
+LOG_VERSION = 1
+LOG_FILE_HEADER_STRUCT = struct.Struct('<8sH32s')
+LOG_RECORD_STRUCT = struct.Struct('<dBI21s')
+
+
+class PacketRecorder:
+    """
+    Appends the packets received from the robot to a log file.
+    """
+
+    def __init__(self, filename, robot_id=''):
+        """
+        :param filename: path of the log file (overwritten)
+        :param robot_id: id of the recorded robot, kept in the file
+        """
+        self.filename = filename
+        self.__lock = threading.Lock()
+        self.__file = open(filename, 'wb')
+        self.__file.write(LOG_FILE_HEADER_STRUCT.pack(LOG_MAGIC, LOG_VERSION, robot_id.encode()[:32]))
+
+    def write(self, timestamp, header, command, packet):
+        """
+        Appends a packet to the log
+
+        :param timestamp: float - time of reception (time.time())
+        :param header: int - header of the packet
+        :param command: the 21 bytes command sent before receiving the packet
+        :param packet: bytes-like - the packet (empty if no packet follows the header)
+        """
+        with self.__lock:
+            if self.__file:
+                self.__file.write(LOG_RECORD_STRUCT.pack(timestamp, header, len(packet), bytes(command)))
+                self.__file.write(packet)
+
+    def close(self):
+        with self.__lock:
+            if self.__file:
+                self.__file.close()
+                self.__file = None
+
+
+class PacketLog:
+    """
+    Reads a log written by PacketRecorder, memory mapped.
+
+    .. code-block:: python
+
+        log = PacketLog('session.epucklog')
+        timestamp, header, command, packet = log[0]
+        images = log.indexes(header=1)
+
+    :var robot_id: id of the recorded robot
+    :var timestamps: numpy array of the reception time of each packet
+    :var headers: numpy array of the header of each packet
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: path of the log file
+        """
+        self.__data = np.memmap(filename, dtype=np.uint8, mode='r')
+
+        magic, version, robot_id = LOG_FILE_HEADER_STRUCT.unpack_from(self.__data)
+        if magic != LOG_MAGIC:
+            raise ValueError(filename + ' is not an e-puck packet log')
+        if version != LOG_VERSION:
+            raise ValueError('Unsupported e-puck packet log version: ' + str(version))
+        self.robot_id = robot_id.rstrip(b'\x00').decode()
+
+        # index of the records: position of each packet in the file
+        offsets, timestamps, headers, sizes = [], [], [], []
+        offset = LOG_FILE_HEADER_STRUCT.size
+        end = len(self.__data)
+        while offset + LOG_RECORD_STRUCT.size <= end:
+            timestamp, header, size, _ = LOG_RECORD_STRUCT.unpack_from(self.__data, offset)
+            if offset + LOG_RECORD_STRUCT.size + size > end:
+                # last packet not completely written
+                break
+            offsets.append(offset)
+            timestamps.append(timestamp)
+            headers.append(header)
+            sizes.append(size)
+            offset += LOG_RECORD_STRUCT.size + size
+
+        self.__offsets = np.array(offsets, dtype=np.int64)
+        self.__sizes = np.array(sizes, dtype=np.int64)
+        self.timestamps = np.array(timestamps, dtype=np.float64)
+        self.headers = np.array(headers, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def __getitem__(self, index):
+        """
+        :returns: (timestamp, header, command, packet), command and packet are read-only numpy views on the file
+        """
+        offset = int(self.__offsets[index])
+        size = int(self.__sizes[index])
+        command_start = offset + LOG_RECORD_STRUCT.size - 21
+        packet_start = offset + LOG_RECORD_STRUCT.size
+
+        return (float(self.timestamps[index]), int(self.headers[index]),
+                self.__data[command_start:packet_start],
+                self.__data[packet_start:packet_start + size])
+
+    def indexes(self, header):
+        """
+        :param header: int - 1 for images, 2 for sensors
+        :returns: numpy array of the indexes of the packets with this header
+        """
+        return np.flatnonzero(self.headers == header)
@@ -1,5 +1,6 @@
 # https://github.com/yorkrobotlab/pi-puck/blob/master/python-library/
 from ..epuck import Epuck
+from ..image_encoding import encode_image
 from .epuck_pipuck_camera_configuration import main as main_cam_configuration
 from .ft903 import FT903
 from smbus2 import SMBus, i2c_msg
@@ -7,9 +8,9 @@ from threading import Thread
 import sys
 import struct
 import subprocess
-import cv2
 import math
 import time
+import numpy as np
 
 ############################
 ## CONSTANTS FOR PI-Puck  ##
@@ -105,7 +106,6 @@ class PiPuckEpuck(Epuck):
             self.robot_i2c_bus = SMBus(ROBOT_I2C_CHANNEL)
             self.pipuck_i2c_bus = SMBus(PIPUCK_I2C_CHANNEL)
             self.__init_command()
-            self.start_time_i2c = time.time()
         except Exception as e:
             print('Cannot connect with pi-puck. \nReason: '+ str(e))
             sys.exit(1)
@@ -113,10 +113,14 @@ class PiPuckEpuck(Epuck):
         # Pipuck propeties
         ## capable of LEDs, micro and speaker ?
         self.ft903 = FT903(self.pipuck_i2c_bus)
+
+        # Communication frequency @ 20 Hz.
+        self.set_loop_rate(1/self.clock_speed)
        
     def set_clock_speed(self, clock_speed):
         "Set new clock speed in Hz"
         self.clock_speed = 1/clock_speed
+        self.set_loop_rate(clock_speed)
    
     def __init_command(self):
         # Init the array containing the commands to be sent to the robot from pi-puck 
@@ -208,17 +212,27 @@ class PiPuckEpuck(Epuck):
         return data
  
     def go_on(self, clock_speed = None):
+        # period in seconds
+        if clock_speed and clock_speed != self.clock_speed:
+            self.clock_speed = clock_speed
+            self.set_loop_rate(1/clock_speed)
+
+        # waits for the next period (see set_loop_rate)
         super().go_on()
 
-        #checksum before sending to the robot 
-        if clock_speed:
-            self.clock_speed = clock_speed
+        latency_stats = self._latency_stats
+        if latency_stats:
+            go_on_start = start = latency_stats.clock()
 
+        #checksum before sending to the robot 
         checksum = 0
         for i in range(I2C_COMMAND_PACKET_SIZE-1):
             checksum ^= self.i2c_command[i]		
         self.i2c_command[I2C_COMMAND_PACKET_SIZE-1] = checksum
 
+        if latency_stats:
+            latency_stats.record('checksum_command', start)
+
       
         #update sensors data and send to robot
         trials = 0
@@ -228,6 +242,9 @@ class PiPuckEpuck(Epuck):
                 #send to robot
                 write = i2c_msg.write(ROBOT_ADDR, self.i2c_command)
 
+                if latency_stats:
+                    start = latency_stats.clock()
+
                 #update accelartor data
                 if self.accData:
                     self.accData = self.read_reg_mpu9250(ACCEL_XOUT_H, 6)
@@ -235,11 +252,17 @@ class PiPuckEpuck(Epuck):
                 #update gyro data
                 if self.gyroData:
                     self.gyroData = self.read_reg_mpu9250(GYRO_XOUT_H, 6)
+
+                if latency_stats:
+                    start = latency_stats.record('imu', start)
                 
                 #receive from robot
                 read = i2c_msg.read(ROBOT_ADDR, I2C_SENSORS_PACKET_SIZE)
                 self.robot_i2c_bus.i2c_rdwr(write, read)
                 self.sensors_data = list(read)
+
+                if latency_stats:
+                    latency_stats.record('i2c', start)
                 break
 
             except Exception as e:
@@ -250,20 +273,19 @@ class PiPuckEpuck(Epuck):
                 print('Program stopped')
                 sys.exit(1)
 
-       
-        # Communication frequency @ 20 Hz.
-        self.time_diff = time.time() - self.start_time_i2c
-        
-        if self.time_diff < self.clock_speed : 
-            time.sleep(self.clock_speed - self.time_diff)
 
-        self.start_time_i2c = time.time()
+        if latency_stats:
+            start = latency_stats.clock()
 
         #check sum to be check once arrived from the robot
         checksum = 0
         for i in range(I2C_SENSORS_PACKET_SIZE - 1):
             checksum ^= self.sensors_data[i]
 
+        if latency_stats:
+            latency_stats.record('checksum_sensors', start)
+            latency_stats.record('go_on', go_on_start)
+
         #Should pass this if condition in each loop-
         if  checksum == self.sensors_data[I2C_SENSORS_PACKET_SIZE - 1]:
             return True
@@ -561,6 +583,8 @@ class PiPuckEpuck(Epuck):
         cam_init_thread = Thread(target=main_cam_configuration, args=())
         cam_init_thread.start()
         cam_init_thread.join()
+        # OpenCV is only needed by the camera
+        import cv2
         self.camera = cv2.VideoCapture(0)
 
 
@@ -574,11 +598,27 @@ class PiPuckEpuck(Epuck):
         ret, frame = self.get_camera_read()
 
         if ret:
-            b,g,r = cv2.split(frame)
+            b,g,r = frame[:, :, 0], frame[:, :, 1], frame[:, :, 2]
             return [r,g,b]
 
         return None,None,None
 
+    def get_frame(self, out=None):
+        read = self.get_camera_read()
+
+        # no image from the camera
+        if not read:
+            return None
+
+        _, frame = read
+
+        # OpenCV already gives a new BGR array
+        if out is None:
+            return frame
+
+        np.copyto(out, frame)
+        return out
+
     def get_camera_read(self):
         """ 
             get camera.read() of openCV
@@ -590,12 +630,43 @@ class PiPuckEpuck(Epuck):
         if success:
             #resize the image if end user asked to change it
             if self.__camera_width != 640 and self.__camera_height != 480:
+                import cv2
                 frame = cv2.resize(frame, (self.__camera_width, self.__camera_height))
 
+            if self._frame_ring is not None:
+                self._frame_ring.push(frame)
+
             return success, frame
 
         return
 
+    def live_camera(self, duration=None):
+        """
+        Lets you stream from the GUI, the images are encoded in memory (see set_stream_format)
+
+        The live_camera method need to be called at each step.
+
+        :param duration: int - duration of the stream. (default: until program ends)
+        """
+        if not self.has_start_stream:
+            # time setting
+            self.start_time = time.time()
+            self.has_start_stream = True
+
+        if duration is None or (time.time() - self.start_time) < duration:
+            frame = self.get_frame()
+            if frame is None:
+                return
+
+            if self.stream_save_image:
+                self._write_image(self.folder_save_img+"/"+self.get_id()+"_image_video.jpg", frame)
+
+            if self.ClientCommunication:
+                self.ClientCommunication.stream_img(encode_image(frame, self.stream_format, self.stream_quality))
+
+        else:
+            self.disable_camera()
+
     def take_picture(self, filename=None):
         """
         Take a picture and save it in the image folder define in :py:meth:`init_camera<unifr_api_epuck.epuck_pipuck.PiPuckEpuck.init_camera>`
@@ -611,7 +682,7 @@ class PiPuckEpuck(Epuck):
             else:
                 path_save_img = self.folder_save_img+"/"+filename+".jpg"
         
-        cv2.imwrite(path_save_img, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
+        self._write_image(path_save_img, frame, 70)
         
        
 
@@ -675,4 +746,5 @@ class PiPuckEpuck(Epuck):
             self.disable_tof()
 
         for _ in range(10):
-            self.go_on()
\ No newline at end of file
+            self.go_on()
+        self.close_frame_store()
@@ -0,0 +1,268 @@
+"""
+Exports the detection network for the other inference backends (see initiate_model(backend=...)).
+
+    python3 -m unifr_api_epuck.export_model --weights best.pt --include torchscript onnx onnx-int8 --check
+
+The files are written next to the weights: best.torchscript (torchscript backend), best.onnx (onnxruntime and opencv backends)
+and best.int8.onnx (onnxruntime-int8 backend, quantized with the frames of the dataset).
+"""
+from .epuck.model_registry import DEFAULT_WEIGHTS, INPUT_SHAPE, model_registry
+from .epuck.inference_backends import BACKENDS, artifact_path
+from .epuck.image_encoding import read_bmp
+from .epuck.detector import prepare_images
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+
+# annotated frames of the e-puck camera, used by --check and to calibrate the quantization
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'yolo', 'dataset', 'annotated')
+
+
+def _spread(files, count):
+    # count files spread over all the list (all of them for None)
+    if count is None or count >= len(files):
+        return files
+    step = len(files) // count
+    return files[::step][:count]
+
+
+def dataset_files(count=None):
+    """
+    :param count: number of frames, spread over all the dataset (None for all)
+    :returns: list of the .bmp files of the dataset (the labels are in the .txt file of the same name)
+    """
+    return _spread(sorted(glob.glob(os.path.join(DATASET, '*.bmp'))), count)
+
+
+def calibration_files(calibration=300):
+    """
+    :param calibration: number of frames calibrating the static quantization (--calibration)
+    :returns: list of the .bmp files of the dataset calibrating the quantization of quantize_onnx()
+    """
+    return dataset_files(calibration)
+
+
+def held_out_files(count=None, calibration=300):
+    """
+    :param count: number of frames, spread over the frames left (None for all)
+    :param calibration: number of frames calibrating the static quantization (--calibration)
+    :returns: list of the .bmp files of the dataset not used to calibrate the quantization, to evaluate the quantized network
+    """
+    return _spread(sorted(set(dataset_files()) - set(calibration_files(calibration))), count)
+
+
+def load_for_export(weights):
+    """
+    :param weights: the .pt file
+    :returns: the fused network, returning only the predictions (not the feature maps of the detection layer)
+    """
+    import torch
+    from .epuck.models.yolo import attempt_load
+
+    # the pickled networks refer to their modules as models.yolo and models.common
+    location = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'epuck')
+    if location not in sys.path:
+        sys.path.insert(0, location)
+
+    # no in-place slice assignment in the detection layer, which the tracer and ONNX do not support
+    model = attempt_load(weights, map_location='cpu', inplace=False, fuse=True)
+
+    class Predictions(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, images):
+            return self.model(images)[0]
+
+    return Predictions(model).eval()
+
+
+def export_torchscript(model, images, path):
+    """
+    :param model: the network of load_for_export()
+    :param images: example input, N x 3 x 128 x 160 float32 tensor
+    :param path: .torchscript file written
+    """
+    import torch
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, images, strict=False)
+    traced.save(path)
+
+
+def export_onnx(model, images, path, opset=12):
+    """
+    :param model: the network of load_for_export()
+    :param images: example input, N x 3 x 128 x 160 float32 tensor
+    :param path: .onnx file written
+    :param opset: ONNX operator set (12 is read by OpenCV 4.5 and ONNX Runtime)
+    """
+    import torch
+
+    options = dict(opset_version=opset, do_constant_folding=True, input_names=['images'], output_names=['output'],
+                   dynamic_axes={'images': {0: 'batch'}, 'output': {0: 'batch'}})
+    with torch.no_grad():
+        try:
+            torch.onnx.export(model, images, path, dynamo=False, **options)  # traced exporter, the default before PyTorch 2.9
+        except TypeError:
+            torch.onnx.export(model, images, path, **options)  # PyTorch < 2.5
+
+
+def onnx_head_nodes(model):
+    """
+    :param model: the onnx.ModelProto of export_onnx(), its unnamed nodes are given a name
+    :returns: names of the nodes of the detection layer after its convolutions (sigmoid, boxes and concatenation)
+    """
+    for i, node in enumerate(model.graph.node):
+        if not node.name:
+            node.name = node.op_type + '_' + str(i)
+
+    producers = {output: node for node in model.graph.node for output in node.output}
+    consumers = {}
+    for node in model.graph.node:
+        for name in node.input:
+            consumers.setdefault(name, []).append(node)
+
+    # the output convolutions of the detection layer are the convolutions followed by a Reshape
+    head = [node for node in model.graph.node if node.op_type == 'Reshape'
+            and node.input[0] in producers and producers[node.input[0]].op_type == 'Conv']
+    names = set()
+    while head:
+        node = head.pop()
+        if node.name not in names:
+            names.add(node.name)
+            for output in node.output:
+                head += consumers.get(output, [])
+    return sorted(names)
+
+
+def quantize_onnx(onnx_path, path, quantization='static', calibration=300):
+    """
+    Quantizes the ONNX network to 8 bits integers with ONNX Runtime.
+    The detection layer after its convolutions stays in float: its output mixes boxes in pixels and confidences between 0 and 1.
+
+    :param onnx_path: .onnx file of export_onnx()
+    :param path: .int8.onnx file written
+    :param quantization: 'static' (weights and activations, calibrated on frames of the dataset) or 'dynamic' (weights only)
+    :param calibration: number of frames of the dataset calibrating the static quantization
+    """
+    import onnx
+    from onnx import version_converter
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # shapes and constants folded by ONNX Runtime, then the operator set 13 of the per channel quantization
+    prepared_path = os.path.splitext(path)[0] + '.prepared.onnx'
+    quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True)
+    model = onnx.load(prepared_path)
+    if model.opset_import[0].version < 13:
+        model = version_converter.convert_version(model, 13)
+    head = onnx_head_nodes(model)
+    onnx.save(model, prepared_path)
+
+    try:
+        if quantization == 'dynamic':
+            quantize_dynamic(prepared_path, path, per_channel=True, weight_type=QuantType.QInt8, nodes_to_exclude=head)
+            return
+
+        class DatasetReader(CalibrationDataReader):
+            def __init__(self, files):
+                self.files = iter(files)
+
+            def get_next(self):
+                file = next(self.files, None)
+                if file is None:
+                    return None
+                return {'images': prepare_images([read_bmp(file)]).astype(np.float32) / 255.0}
+
+        files = calibration_files(calibration)
+        if not files:
+            raise FileNotFoundError('No frames to calibrate the quantization in ' + DATASET)
+        quantize_static(prepared_path, path, DatasetReader(files), quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, nodes_to_exclude=head)
+    finally:
+        os.remove(prepared_path)
+
+
+def check(weights, backends, count=64, conf_thresh=0.5):
+    """
+    Compares the detections of the backends with the ones of the eager backend on frames of the dataset
+
+    :param weights: the .pt file
+    :param backends: backends compared to 'eager'
+    :param count: number of frames of the dataset
+    :param conf_thresh: minimum confidence of the detections compared
+    :returns: True if all the backends find the same objects
+    """
+    files = dataset_files(count)
+    if not files:
+        print('No frames in ' + DATASET)
+        return False
+    frames = [read_bmp(file) for file in files]
+
+    reference = model_registry.get(weights, 'cpu', True, 0, 'eager').detect(frames, conf_thresh)
+    same = True
+    for backend in backends:
+        try:
+            detections = model_registry.get(weights, 'cpu', True, 0, backend).detect(frames, conf_thresh)
+        except (ImportError, FileNotFoundError) as e:
+            print('{:16} skipped: {}'.format(backend, e))
+            continue
+
+        differences = 0
+        max_error = 0.0
+        for expected, detection in zip(reference, detections):
+            # the order of boxes of equal confidence may differ, each box is compared to the closest one of its class
+            if sorted(map(str, (item.label for item in expected))) != sorted(map(str, (item.label for item in detection))):
+                differences += 1
+                continue
+            for a in expected:
+                max_error = max(max_error, min(max(abs(a.x_center - b.x_center), abs(a.y_center - b.y_center),
+                                                   abs(a.width - b.width), abs(a.height - b.height))
+                                               for b in detection if b.label == a.label))
+        print('{:16} {} frames, {} objects, {} frames with other objects, largest box difference {:.3f} px'.format(
+            backend, len(frames), sum(len(detection) for detection in detections), differences, max_error))
+        same = same and differences == 0
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exports the detection network for the other inference backends')
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS, help='.pt file (default: the weights trained for the blocks)')
+    parser.add_argument('--include', nargs='+', default=['torchscript', 'onnx'], choices=['torchscript', 'onnx', 'onnx-int8'])
+    parser.add_argument('--batch', type=int, default=1, help='batch size of the example input (the batch size stays dynamic in ONNX)')
+    parser.add_argument('--opset', type=int, default=12, help='ONNX operator set')
+    parser.add_argument('--quantization', default='static', choices=['static', 'dynamic'],
+                        help='onnx-int8: static (weights and activations) or dynamic (weights only)')
+    parser.add_argument('--calibration', type=int, default=300, help='onnx-int8: number of frames calibrating the static quantization')
+    parser.add_argument('--check', action='store_true', help='compare the detections of the backends on frames of the dataset')
+    args = parser.parse_args()
+
+    import torch
+
+    model = load_for_export(args.weights)
+    images = torch.zeros((args.batch,) + INPUT_SHAPE)
+    model(images)  # builds the grids of the detection layer
+
+    if 'torchscript' in args.include:
+        path = artifact_path(args.weights, 'torchscript')
+        export_torchscript(model, images, path)
+        print('TorchScript: ' + path)
+    onnx_path = artifact_path(args.weights, 'onnxruntime')
+    if 'onnx' in args.include or ('onnx-int8' in args.include and not os.path.exists(onnx_path)):
+        export_onnx(model, images, onnx_path, args.opset)
+        print('ONNX: ' + onnx_path)
+    if 'onnx-int8' in args.include:
+        path = artifact_path(args.weights, 'onnxruntime-int8')
+        quantize_onnx(onnx_path, path, args.quantization, args.calibration)
+        print('ONNX int8 ({} quantization): {}'.format(args.quantization, path))
+
+    if args.check:
+        check(args.weights, [backend for backend in BACKENDS if backend != 'eager'])
+
+
+if __name__ == "__main__":
+    main()
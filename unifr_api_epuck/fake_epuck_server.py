@@ -0,0 +1,303 @@
+"""
+Simulated e-pucks answering like the real robots over Wi-Fi (TCP), to test and benchmark without hardware.
+
+Start 10 simulated robots on the ports 10000 to 10009 from your terminal:
+
+.. code-block:: shell
+
+    $ python3 -m unifr_api_epuck.fake_epuck_server --robots 10 --port 10000 --latency 0.02 --jitter 0.005
+
+Then connect to them with the port in the address:
+
+.. code-block:: python
+
+    from unifr_api_epuck import wrapper
+
+    r = wrapper.get_robot('127.0.0.1:10000')
+"""
+from .epuck.epuck_wifi import SENSORS_PACKET_STRUCT
+import argparse
+import asyncio
+import math
+import random
+import threading
+import time
+import numpy as np
+
+COMMAND_PACKET_SIZE = 21
+CAMERA_WIDTH = 160
+CAMERA_HEIGHT = 120
+
+HEADER_IMAGE = b'\x01'
+HEADER_SENSORS = b'\x02'
+HEADER_EMPTY = b'\x03'
+
+
+def encode_rgb565(rgb):
+    """
+    Encodes an image in the RGB565 format sent by the e-puck (2 bytes per pixel: rrrrrggg gggbbbbb)
+
+    :param rgb: HxWx3 uint8 array (red, green, blue)
+    :returns: bytes - 2xHxW bytes
+    """
+    red = rgb[:, :, 0].astype(np.uint16)
+    green = rgb[:, :, 1].astype(np.uint16)
+    blue = rgb[:, :, 2].astype(np.uint16)
+    rgb565 = ((red & 0xF8) << 8) | ((green & 0xFC) << 3) | (blue >> 3)
+    return rgb565.astype('>u2').tobytes()
+
+
+def make_frames(count=16):
+    """
+    Synthetic camera frames: a colour gradient moving to the right.
+
+    :returns: list of count RGB565 frames (bytes)
+    """
+    x = np.arange(CAMERA_WIDTH)
+    y = np.arange(CAMERA_HEIGHT)[:, None]
+    frames = []
+    for i in range(count):
+        shift = i * CAMERA_WIDTH // count
+        rgb = np.zeros((CAMERA_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
+        rgb[:, :, 0] = ((x + shift) % CAMERA_WIDTH) * 255 // CAMERA_WIDTH
+        rgb[:, :, 1] = y * 255 // CAMERA_HEIGHT
+        rgb[:, :, 2] = 128
+        frames.append(encode_rgb565(rgb))
+    return frames
+
+
+class FakeEpuck:
+    """
+    A simulated e-puck: answers each command packet with one packet, like WifiEpuck.go_on() expects.
+
+    * sensors only requested: sensors packet
+    * camera only requested: image packet
+    * camera and sensors requested: image and sensors packets alternately
+    * nothing requested: empty packet (header 3)
+
+    :var commands_count: number of commands received
+    """
+
+    def __init__(self, frames, latency=0.0, jitter=0.0):
+        """
+        :param frames: list of RGB565 frames sent in loop by the camera
+        :param latency: time in seconds before answering a command
+        :param jitter: the latency varies randomly by +/- jitter seconds
+        """
+        self.frames = frames
+        self.latency = latency
+        self.jitter = jitter
+
+        self.commands_count = 0
+        self.__speeds = (0, 0)
+        self.__steps = [0.0, 0.0]
+        self.__last_time = time.monotonic()
+        self.__image_turn = True
+        self.__writers = set()
+
+    def answer(self, command):
+        """
+        :param command: the 21 bytes command packet
+        :returns: list of bytes to send to the computer
+        """
+        self.commands_count += 1
+        now = time.monotonic()
+        dt = now - self.__last_time
+        self.__last_time = now
+
+        # motors (steps/s) move the wheels
+        for i in range(2):
+            self.__steps[i] += self.__speeds[i] * dt
+        self.__speeds = (
+            int.from_bytes(command[3:5], 'little', signed=True),
+            int.from_bytes(command[5:7], 'little', signed=True))
+
+        camera = command[1] & 1
+        sensors = command[1] & 2
+
+        if camera and (self.__image_turn or not sensors):
+            self.__image_turn = False
+            return [HEADER_IMAGE, self.frames[self.commands_count % len(self.frames)]]
+
+        self.__image_turn = True
+        if sensors:
+            return [HEADER_SENSORS, self.sensors_packet(now)]
+
+        return [HEADER_EMPTY]
+
+    def sensors_packet(self, now):
+        """
+        :returns: bytes - synthetic 104 bytes sensors packet
+        """
+        steps = [(int(s) + 32768) % 65536 - 32768 for s in self.__steps]
+        prox = [int(300 + 250 * math.sin(now + i)) for i in range(8)]
+
+        return SENSORS_PACKET_STRUCT.pack(
+            0, 0, 2048,                                 # accelerometer axes
+            2048.0, 0.0, 0.0,                           # acceleration, orientation, inclination
+            0, 0, (self.__speeds[1] - self.__speeds[0]) // 10,  # gyroscope axes
+            0.0, 0.0, 0.0,                              # magnetometer
+            25,                                         # temperature
+            *prox,                                      # proximity
+            *[3000] * 8,                                # ambient light
+            100,                                        # time of flight
+            10, 10, 10, 10,                             # microphones
+            *steps,                                     # motors steps
+            3800,                                       # battery
+            0,                                          # micro sd
+            0, 0, 0,                                    # tv remote
+            0,                                          # selector
+            800, 800, 800,                              # ground proximity
+            3000, 3000, 3000,                           # ground ambient
+            0, 0)                                       # button, unused
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the commands of one connection until it is closed.
+        """
+        self.__writers.add(writer)
+        try:
+            while True:
+                command = await reader.readexactly(COMMAND_PACKET_SIZE)
+
+                delay = self.latency + random.uniform(-self.jitter, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                writer.writelines(self.answer(command))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.__writers.discard(writer)
+            writer.close()
+
+    def disconnect(self):
+        """
+        Closes the open connections, like a robot going out of Wi-Fi range.
+        """
+        for writer in list(self.__writers):
+            writer.close()
+
+
+class FakeEpuckServer:
+    """
+    Runs many simulated e-pucks in one asyncio event loop, each listening on its own TCP port.
+
+    .. code-block:: python
+
+        server = FakeEpuckServer(robots=10, port=0, latency=0.02)
+        addresses = server.start_in_thread()  # e.g. ['127.0.0.1:40123', ...]
+        r = wrapper.get_robot(addresses[0])
+
+    :var robots: list of FakeEpuck
+    :var addresses: list of the 'host:port' addresses of the robots (once started)
+    """
+
+    def __init__(self, robots=1, host='127.0.0.1', port=1000, latency=0.0, jitter=0.0):
+        """
+        :param robots: number of simulated robots
+        :param host: address to listen to
+        :param port: port of the first robot, the next ones use the following ports (0: any free port)
+        :param latency: time in seconds before a robot answers a command
+        :param jitter: the latency varies randomly by +/- jitter seconds
+        """
+        self.host = host
+        self.port = port
+        frames = make_frames()
+        self.robots = [FakeEpuck(frames, latency, jitter) for _ in range(robots)]
+        self.addresses = []
+
+        self.__servers = []
+        self.__loop = None
+        self.__thread = None
+
+    async def start(self):
+        """
+        Starts listening for all the robots.
+
+        :returns: list of the 'host:port' addresses of the robots
+        """
+        for i, robot in enumerate(self.robots):
+            port = self.port + i if self.port else 0
+            server = await asyncio.start_server(robot.handle_connection, self.host, port)
+            self.__servers.append(server)
+            self.addresses.append(self.host + ':' + str(server.sockets[0].getsockname()[1]))
+
+        return self.addresses
+
+    async def serve_forever(self):
+        """
+        Starts the robots and answers until cancelled.
+        """
+        if not self.__servers:
+            await self.start()
+        await asyncio.gather(*[server.serve_forever() for server in self.__servers])
+
+    def start_in_thread(self):
+        """
+        Runs the robots in a background thread, to use them from the same program as blocking controllers (WifiEpuck, Fleet).
+
+        :returns: list of the 'host:port' addresses of the robots
+        """
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__loop.run_forever, daemon=True)
+        self.__thread.start()
+        return asyncio.run_coroutine_threadsafe(self.start(), self.__loop).result()
+
+    def disconnect(self):
+        """
+        Closes the connections of all the robots (they keep listening for new ones).
+        """
+        if self.__loop:
+            self.__loop.call_soon_threadsafe(self.__disconnect)
+        else:
+            self.__disconnect()
+
+    def __disconnect(self):
+        for robot in self.robots:
+            robot.disconnect()
+
+    def stop(self):
+        """
+        Stops listening and closes the connections.
+        """
+        if self.__loop:
+            asyncio.run_coroutine_threadsafe(self.__close(), self.__loop).result()
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__loop.close()
+            self.__loop = None
+
+    async def __close(self):
+        for server in self.__servers:
+            server.close()
+        self.__disconnect()
+        for server in self.__servers:
+            await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated e-pucks answering like the real robots over Wi-Fi.')
+    parser.add_argument('--robots', type=int, default=1, help='number of simulated robots')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen to')
+    parser.add_argument('--port', type=int, default=1000, help='port of the first robot, the next ones use the following ports')
+    parser.add_argument('--latency', type=float, default=0.0, help='time in seconds before answering a command')
+    parser.add_argument('--jitter', type=float, default=0.0, help='the latency varies randomly by +/- jitter seconds')
+    args = parser.parse_args()
+
+    server = FakeEpuckServer(args.robots, args.host, args.port, args.latency, args.jitter)
+
+    async def run():
+        for address in await server.start():
+            print('Simulated e-puck listening on ' + address)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
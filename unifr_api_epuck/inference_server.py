@@ -0,0 +1,163 @@
+"""
+Inference server: loads the detection network once and analyses the frames of all the controllers of this computer.
+
+    python3 -m unifr_api_epuck.inference_server --weights best.pt --port 50010
+
+The controllers use it with robot.initiate_model(server='127.0.0.1:50010').
+"""
+from .epuck.inference_client import InferenceManager, INFERENCE_SERVER_PORT, INFERENCE_SERVER_AUTHKEY, FRAME_SHAPE, MAX_BATCH
+from .epuck.model_registry import model_registry
+from multiprocessing import shared_memory
+import argparse
+import queue
+import threading
+import numpy as np
+
+
+def _attach(name):
+    """
+    Attaches the shared memory of a client, without letting this process remove it at exit
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        slot = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(slot._name, 'shared_memory')
+        return slot
+
+
+class InferenceServer:
+    """
+    Serves the detection to the InferenceClient of the controllers.
+
+    The requests of all the clients waiting at the same time are analysed in one batch of the network.
+
+    :var processed: number of frames analysed
+    :var batches: number of passes of the network
+    """
+
+    def __init__(self, weights=None, fuse=True, warmup=1, host='127.0.0.1', port=INFERENCE_SERVER_PORT,
+                 authkey=INFERENCE_SERVER_AUTHKEY, max_batch=4 * MAX_BATCH, backend='eager'):
+        """
+        :param weights: a .pt file (default: the weights trained for the blocks)
+        :param fuse: True to fuse the convolution and batch normalisation layers
+        :param warmup: number of passes run on an empty image after loading
+        :param host: address listened to ('0.0.0.0' for all the interfaces, but the shared memory only works on the same computer)
+        :param port: port listened to
+        :param authkey: authentication key of the clients
+        :param max_batch: maximum number of frames analysed in one pass
+        :param backend: 'eager' (PyTorch), 'torchscript', 'onnxruntime', 'opencv' or 'onnxruntime-int8'
+        """
+        self.model = model_registry.get(weights, 'cpu', fuse, warmup, backend)
+        self.max_batch = max_batch
+        self.processed = 0
+        self.batches = 0
+
+        self.__requests = queue.Queue()
+        self.__responses = {}
+        self.__slots = {}
+        self.__lock = threading.Lock()
+
+        InferenceManager.register('requests', callable=lambda: self.__requests)
+        InferenceManager.register('responses', callable=self.__get_responses)
+        self.__manager = InferenceManager((host, port), authkey=authkey)
+        self.__server = self.__manager.get_server()
+
+    def __get_responses(self, client_id):
+        with self.__lock:
+            if client_id not in self.__responses:
+                self.__responses[client_id] = queue.Queue()
+            return self.__responses[client_id]
+
+    def serve_forever(self):
+        """
+        Answers the requests until the process is stopped (Ctrl+C)
+        """
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        stats = self.model.get_stats()
+        print('Inference server listening on {}:{} ({} backend loaded in {:.2f}s, {:.1f}MB)'.format(
+            *self.__server.address, stats['backend'], stats['load_time'], stats['memory'] / 1e6))
+
+        try:
+            while True:
+                self.__serve_batch()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for slot in self.__slots.values():
+                slot.close()
+
+    def __serve_batch(self):
+        # the first request, then the ones already waiting
+        requests = [self.__requests.get()]
+        count = requests[0][4]
+        while count < self.max_batch:
+            try:
+                request = self.__requests.get_nowait()
+            except queue.Empty:
+                break
+            requests.append(request)
+            count += request[4]
+
+        detect_requests = []
+        for request in requests:
+            kind, client_id, request_id, slot_name, count, conf_thresh = request
+            if kind == 'close':
+                self.__close_client(client_id, slot_name)
+            else:
+                detect_requests.append(request)
+
+        if not detect_requests:
+            return
+
+        frames = []
+        for _, _, _, slot_name, count, _ in detect_requests:
+            slot = self.__slots.get(slot_name)
+            if slot is None:
+                slot = self.__slots[slot_name] = _attach(slot_name)
+            frames += list(np.ndarray((count,) + FRAME_SHAPE, dtype=np.uint8, buffer=slot.buf))
+
+        try:
+            detections = self.model.detect_arrays(frames, min(request[5] for request in detect_requests))
+        except Exception as e:
+            for _, client_id, request_id, _, _, _ in detect_requests:
+                self.__get_responses(client_id).put((request_id, e))
+            return
+
+        self.batches += 1
+        self.processed += len(frames)
+
+        start = 0
+        for _, client_id, request_id, _, count, conf_thresh in detect_requests:
+            result = [detection[detection[:, 4] >= conf_thresh] for detection in detections[start:start + count]]
+            start += count
+            self.__get_responses(client_id).put((request_id, result))
+
+    def __close_client(self, client_id, slot_name):
+        slot = self.__slots.pop(slot_name, None)
+        if slot is not None:
+            slot.close()
+        with self.__lock:
+            self.__responses.pop(client_id, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detection server shared by the controllers of this computer')
+    parser.add_argument('--weights', default=None, help='.pt file (default: the weights trained for the blocks)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=INFERENCE_SERVER_PORT)
+    parser.add_argument('--authkey', default=INFERENCE_SERVER_AUTHKEY.decode())
+    parser.add_argument('--no-fuse', action='store_true', help='do not fuse the convolution and batch normalisation layers')
+    parser.add_argument('--warmup', type=int, default=1, help='number of passes on an empty image after loading')
+    parser.add_argument('--max-batch', type=int, default=4 * MAX_BATCH, help='maximum number of frames in one pass')
+    parser.add_argument('--backend', default='eager', help='eager, torchscript, onnxruntime, opencv or onnxruntime-int8')
+    args = parser.parse_args()
+
+    server = InferenceServer(args.weights, not args.no_fuse, args.warmup, args.host, args.port,
+                             args.authkey.encode(), args.max_batch, args.backend)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from .epuck.epuck_webots import WebotsEpuck 
 from .epuck.epuck_wifi import WifiEpuck
+from .epuck.epuck_wifi_async import AsyncWifiEpuck
+from .epuck.fleet import Fleet
+from .epuck.epuck_replay import ReplayEpuck
 from .communication.socket_client_communication import SocketClientCommunication
 
 def get_robot(ip_addr=None, is_pipuck = False):
@@ -33,6 +36,45 @@ def get_robot(ip_addr=None, is_pipuck = False):
 
     return __get_robot_webot()
 
+async def get_async_robot(ip_addr):
+    """
+    Get the instance of a real e-puck controlled with asyncio, already connected
+
+    .. note::
+        Must be awaited, e.g. ``my_robot = await wrapper.get_async_robot('192.168.43.125')``
+
+    :param ip_addr: ip address of the e-puck
+
+    :returns: instance of the e-puck (AsyncWifiEpuck)
+    """
+    print('initiating connection with ' + str(ip_addr))
+
+    robot = AsyncWifiEpuck(ip_addr)
+    await robot.connect()
+    return robot
+
+def get_fleet(ip_addrs):
+    """
+    Get a fleet of real e-pucks, all controlled by a single go_on()
+
+    :param ip_addrs: list of the ip addresses of the e-pucks
+
+    :returns: instance of Fleet
+    """
+    return Fleet(ip_addrs)
+
+def get_replay_robot(filename, realtime=True, loop=False):
+    """
+    Get an e-puck replaying a session recorded with WifiEpuck.init_recording()
+
+    :param filename: path of the log file
+    :param realtime: True to replay at the recorded speed, False as fast as possible
+    :param loop: True to restart from the beginning at the end of the log
+
+    :returns: instance of ReplayEpuck
+    """
+    return ReplayEpuck(filename, realtime, loop)
+
 def get_client(client_id, host_ip='localhost'):
     """
     Get an instance of a client for communication